@@ -1,4 +1,7 @@
 from .core.Builder import Builder
+from .core.Server import Server
+from .core.Batch import Batch
+from .core.Index import Index
 from .common.Logger import Logger
 
 from os import path
@@ -12,6 +15,14 @@ def main():
 
     parser = argparse.ArgumentParser()
 
+    parser.add_argument('command', nargs='?', default='convert',
+                        choices=['convert', 'serve', 'batch', 'restamp', 'index'],
+                        help='convert (default) the input files, serve conversion jobs on a socket, convert '
+                             'the input files of a batch of configurations, restamp the attributes and '
+                             'variables of converted outputs, or index the headers of the input files')
+    parser.add_argument('config_files', nargs='*',
+                        help='Configuration files or glob patterns converted by the batch command')
+
     parser.add_argument('-C', '--config-file', default='config.yaml',
                         help='Configuration file path (default: configs.xml)')
     parser.add_argument('-O', '--output-format', default=None,
@@ -20,6 +31,22 @@ def main():
                         help='Input files format as produced by the Lidar: S100, V1,...')
     parser.add_argument('-D', '--input-path', default=None,
                         help='Input datasets directory path')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of output blocks converted in parallel (default: 1, 0 uses all cpus)')
+    parser.add_argument('--since', default=None,
+                        help='Only convert the input files whose name time is at or after this time, e.g. 2019-03-08')
+    parser.add_argument('--until', default=None,
+                        help='Only convert the input files whose name time is before this time, e.g. 2019-03-09T12:00')
+    parser.add_argument('--resume', action='store_true', default=False,
+                        help='Only convert the output blocks whose input files changed since the last conversion')
+    parser.add_argument('--watch', action='store_true', default=False,
+                        help='Keep running, converting new input files as they land in the input path')
+    parser.add_argument('--interval', type=float, default=10,
+                        help='Seconds between polls of the input path in watch mode (default: 10)')
+    parser.add_argument('--socket', default=None,
+                        help='Unix socket path the server listens on')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Localhost port the server listens on, when no socket is given (default: 8765)')
     parser.add_argument('-v', '--verbose', action='store_true', default=False,
                         help='explain what is being done')
     parser.add_argument('-V', '--version', action='store_true', default=False,
@@ -34,12 +61,30 @@ def main():
     Logger.set_args(args)
     Logger.header()
 
-    if not args.version:
+    if args.version:
+        Logger.log('about')
+    elif args.config_files and args.command != 'batch':
+        parser.error('configuration files are only given to the batch command, use --config-file')
+    elif args.command == 'batch':
+        Batch(args.config_files or [args.config_file], args.jobs, args.resume, args.context,
+              input_path=args.input_path, input_format=args.input_format, output_format=args.output_format,
+              since=args.since, until=args.until).run()
+    elif args.command == 'serve':
+        port = args.port if args.port is not None or args.socket is not None else 8765
+        Server(args.socket, port, args.jobs).serve_forever()
+    else:
         args_dict = vars(args)
-        args_dict.pop('verbose')
-        args_dict.pop('version')
-        args_dict.pop('debug')
+        command = args_dict.pop('command')
+        for key in ('config_files', 'verbose', 'version', 'debug', 'socket', 'port'):
+            args_dict.pop(key)
+        watch = args_dict.pop('watch')
+        interval = args_dict.pop('interval')
         builder = Builder(**args_dict)
-        builder.build()
-    else:
-        Logger.log('about')
+        if command == 'restamp':
+            builder.restamp()
+        elif command == 'index':
+            Index(builder).run()
+        elif watch:
+            builder.watch(interval)
+        else:
+            builder.build()
@@ -1,4 +1,5 @@
 import sys
+from types import SimpleNamespace
 
 
 class Logger:
@@ -23,11 +24,39 @@ class Logger:
         'started_r_files': 'Processing {} ...',
         'grouping': 'Grouping files...',
         'writing_file': 'Writing to {} {}.',
+        'planned_rows': 'Planned {} rows for {}.',
+        'watching': 'Watching {} for new input files every {} s (Ctrl+C to stop).',
+        'serving': 'Serving conversion jobs on {} using {} processes (Ctrl+C to stop).',
+        'up_to_date': '{} is up to date.',
+        'resuming': 'Resuming: {} of {} output blocks are up to date.',
+        'batch_config': 'Configuration {}',
+        'batch_load_failed': 'Failed loading {}. Native error: {}',
+        'batch_summary_header': 'Summary (output blocks converted, up to date, failed):',
+        'batch_summary_config': '  {}: {} converted, {} up to date, {} failed',
+        'batch_summary_not_loaded': '  {}: failed to load',
+        'batch_summary_total': '{} configurations: {} converted, {} up to date, {} failed, in {:.1f} s.',
+        'batch_failed': '{} of {} configurations had errors.',
+        'restamped': 'Restamped {}: {}.',
+        'restamp_unchanged': '{} is up to date.',
+        'restamp_done': 'Restamped {} of {} output files.',
+        'restamp_unsupported': 'Output format {} cannot be restamped, convert the input files again.',
+        'restamp_skipped': 'Output format {} cannot be restamped, its outputs are left unchanged.',
+        'indexed': 'Indexed the input files in {}: {} read, {} unchanged, {} removed.',
+        'index_failed': 'Failed indexing {}. Native error: {}',
+        'index_unsupported': 'The {} reader does not index its input files.',
+        'restamp_data_type': 'The data type of {} differs in {}, convert the input files again to change it.',
+        'restamp_stale': '{} was converted with other parameters, convert the input files again.',
+        'parallel_blocks': 'Converting {} output blocks using {} processes.',
+        'parallel_parsing': 'Parsing input files using {} processes.',
+        'failed_group': 'Failed converting {}. Native error: {}',
         'exit_msg': 'Failed.',
         'files_not_found': 'No valid files were found.',
         'loading_config': 'Loading configurations from {} .',
         'bad_config_file': 'Failed to load config file. ',
         'bad_config_formatting': 'Failed loading; {}',
+        'bad_time_window': 'Invalid input {} time "{}", use e.g. 2019-03-08 or 2019-03-08T12:00.',
+        'bad_storage_option': 'Unknown output compression option "{}", use one of: {}.',
+        'bad_time_format': 'Unknown output time_format "{}", use iso8601 or numeric.',
         'missing_reader_param': 'The config {}, required by the "{}" reader is not set. ' +
                                 'Set it under in the .yaml files.',
         'done': 'Done.',
@@ -41,6 +70,7 @@ class Logger:
     }
     verbose = False
     _debug = False
+    _captured = None
 
     @staticmethod
     def set_args(args):
@@ -52,6 +82,42 @@ class Logger:
         Logger.verbose = args.verbose
         Logger._debug = args.debug
 
+    @staticmethod
+    def get_args():
+        """
+        Returns the current Logger arguments, in the form accepted by set_args.
+        Used to configure the Logger of worker processes.
+        :return: namespace with 'verbose', 'debug' attributes
+        """
+        return SimpleNamespace(verbose=Logger.verbose, debug=Logger._debug)
+
+    @staticmethod
+    def capture():
+        """
+        Starts buffering the printed messages instead of writing them to the standard output.
+        :return: void
+        """
+        Logger._captured = []
+
+    @staticmethod
+    def release():
+        """
+        Stops buffering messages.
+        :return: the list of messages buffered since capture() was called
+        """
+        captured, Logger._captured = Logger._captured or [], None
+        return captured
+
+    @staticmethod
+    def replay(lines):
+        """
+        Prints messages previously buffered (e.g. by a worker process).
+        :param lines: list of already formatted messages
+        :return: void
+        """
+        for line in lines:
+            print(line)
+
     @staticmethod
     def __print_std_output(prefix, msg_name, *args):
         """
@@ -62,10 +128,12 @@ class Logger:
         :return: void
         """
         formatted_msg = args[0] if msg_name is None else Logger.messages[msg_name].format(*args)
-        if prefix is None:
-            print(formatted_msg)
+        if prefix is not None:
+            formatted_msg = prefix + ' ' + formatted_msg
+        if Logger._captured is not None:
+            Logger._captured.append(formatted_msg)
         else:
-            print(prefix, formatted_msg)
+            print(formatted_msg)
 
     @staticmethod
     def header():
@@ -105,7 +173,11 @@ class Logger:
         :return:
         """
         if Logger._debug:
-            Logger.__print_std_output('[Debug] \n', msg_name, *args)
+            if msg_name in Logger.messages:
+                Logger.__print_std_output('[Debug] \n', msg_name, *args)
+            else:
+                # native error or traceback
+                Logger.__print_std_output('[Debug] \n', None, str(msg_name))
 
     @staticmethod
     def warn(msg_name, *args):
@@ -0,0 +1,157 @@
+from os import path, stat, getpid
+import io
+import gzip
+import bz2
+import lzma
+import zipfile
+import tarfile
+
+
+class Opener:
+    """
+    Shared opener of input files, used by the readers instead of open(). Input files may be compressed
+    (.gz, .bz2, .xz) or be members of .zip/.tar archives, addressed as a path inside the archive, e.g.
+    campaign/20190308.zip/User5_96_20190308_200500.hpl. They are decompressed as they are read, without being
+    extracted to (temporary) files. In-memory inputs are passed as a MemoryFile.
+    """
+
+    COMPRESSIONS = {
+        '.gz': gzip.open,
+        '.bz2': bz2.open,
+        '.xz': lzma.open,
+    }
+
+    ARCHIVES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+    # archive kept open between its members, usually read in order: (process id, path, modification time,
+    # ZipFile | TarFile); forked processes open their own, as the file position is shared with the parent.
+    _archive = None
+
+    @staticmethod
+    def open(file_path, mode='r', encoding=None):
+        """
+        Opens an input file for reading, decompressing it if needed.
+        :param file_path: file path, or path of an archive member
+        :param mode: 'r' (text) or 'rb' (binary)
+        :param encoding: text encoding, as in open()
+        :return: file object
+        """
+        if isinstance(file_path, MemoryFile):
+            stream = io.BytesIO(file_path.data)
+            compression = Opener.COMPRESSIONS.get(path.splitext(file_path)[1].lower())
+            if compression is not None:
+                stream = compression(stream, 'rb')
+            return stream if 'b' in mode else io.TextIOWrapper(stream, encoding=encoding)
+
+        archive_path, member = (file_path, None) if path.isfile(file_path) else Opener.split(file_path)
+        if member is None:
+            compression = Opener.COMPRESSIONS.get(path.splitext(file_path)[1].lower())
+            if compression is None:
+                return open(file_path, mode, encoding=encoding)
+            stream = compression(file_path, 'rb')
+        else:
+            stream = Opener.open_member(archive_path, member)
+            compression = Opener.COMPRESSIONS.get(path.splitext(member)[1].lower())
+            if compression is not None:
+                stream = compression(stream, 'rb')
+
+        return stream if 'b' in mode else io.TextIOWrapper(stream, encoding=encoding)
+
+    @staticmethod
+    def open_member(archive_path, member):
+        """
+        :param archive_path: .zip or .tar archive path
+        :param member: member name
+        :return: binary stream of the archive member
+        """
+        key = (getpid(), archive_path, stat(archive_path).st_mtime_ns)
+        if Opener._archive is None or Opener._archive[:3] != key:
+            if Opener._archive is not None and Opener._archive[0] == key[0]:
+                Opener._archive[3].close()
+            if zipfile.is_zipfile(archive_path):
+                archive = zipfile.ZipFile(archive_path)
+            else:
+                archive = tarfile.open(archive_path)
+            Opener._archive = key + (archive,)
+
+        archive = Opener._archive[3]
+        if isinstance(archive, zipfile.ZipFile):
+            return archive.open(member)
+        stream = archive.extractfile(member)
+        if stream is None:
+            raise IsADirectoryError(member)
+        return stream
+
+    @staticmethod
+    def split(file_path):
+        """
+        :param file_path: file path, or path of an archive member
+        :return: (path of the archive containing the file, member name), (file_path, None) if it is not in one.
+        """
+        parts = file_path.replace('\\', '/').split('/')
+        for i in range(len(parts) - 1, 0, -1):
+            archive_path = '/'.join(parts[:i])
+            if Opener.is_archive(archive_path) and path.isfile(archive_path):
+                return archive_path, '/'.join(parts[i:])
+        return file_path, None
+
+    @staticmethod
+    def is_archive(file_path):
+        return file_path.lower().endswith(Opener.ARCHIVES)
+
+    @staticmethod
+    def members(archive_path):
+        """
+        Lists the files of an archive, without decompressing them (but for compressed tar archives, which
+        are read once).
+        :param archive_path: .zip or .tar archive path
+        :return: member names
+        """
+        if zipfile.is_zipfile(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                return [info.filename for info in archive.infolist() if not info.is_dir()]
+        with tarfile.open(archive_path) as archive:
+            return [info.name for info in archive.getmembers() if info.isfile()]
+
+    @staticmethod
+    def name(file_path):
+        """
+        :param file_path: file path, or path of an archive member
+        :return: file name without the compression extension, e.g. User5_96_20190308_200500.hpl for
+        User5_96_20190308_200500.hpl.gz, as seen by Reader.accepts_file and Reader.output_filename.
+        """
+        name = path.basename(file_path.replace('\\', '/'))
+        stem, extension = path.splitext(name)
+        return stem if extension.lower() in Opener.COMPRESSIONS and not Opener.is_archive(name) else name
+
+    @staticmethod
+    def stat(file_path):
+        """
+        :param file_path: file path, or path of an archive member
+        :return: os.stat_result of the file, or of the archive containing it.
+        """
+        return stat(Opener.split(file_path)[0])
+
+
+class MemoryFile(str):
+    """
+    In-memory input file: the file name (a str, as the input file paths given to the readers) holding the file
+    contents, which Opener.open reads instead of a file on disk.
+    """
+
+    def __new__(cls, name, data):
+        """
+        :param name: file name, e.g. User5_96_20190308_200500.hpl (or .hpl.gz for compressed contents)
+        :param data: file contents: bytes, or a binary (or text) file-like object, which is read
+        """
+        if hasattr(data, 'read'):
+            data = data.read()
+        if isinstance(data, str):
+            data = data.encode()
+        memory_file = super().__new__(cls, name)
+        memory_file.data = bytes(data)
+        return memory_file
+
+    def __reduce__(self):
+        # pickled with its contents, e.g. for the parsing processes
+        return MemoryFile, (str(self), self.data)
@@ -0,0 +1,135 @@
+import re
+from itertools import islice
+import numpy as np
+
+from .Opener import Opener
+
+
+class Table:
+    """
+    Numeric block of a delimited text file, i.e. the rows following its header, parsed into typed numpy arrays.
+
+    Columns are selected by index, or by slice for strided column groups (e.g. slice(7, None, 12) selects the
+    same columns as row[7::12]); all the columns requested in one call are parsed in a single pass by numpy's
+    C parser, instead of splitting every row and converting each cell with float().
+    """
+
+    def __init__(self, lines, sep='\t', decimal='.', missing_values=(), fill_value=np.nan):
+        """
+        Constructor.
+        :param lines: data rows (without header), blank rows are ignored
+        :param sep: column separator, None for any whitespace
+        :param decimal: decimal mark, e.g. ',' for files exported with a german locale
+        :param missing_values: values (e.g. '' or '-999') replaced by fill_value
+        :param fill_value: value of missing cells
+        """
+        if decimal == sep:
+            raise ValueError('The decimal mark cannot be the column separator.')
+        self.lines = [line for line in lines if line.strip()]
+        self.sep = sep
+        self.decimal = decimal
+        self.missing_values = tuple(missing_values)
+        self.fill_value = fill_value
+        self._numeric_lines = None
+
+    @staticmethod
+    def count_rows(file_path, skip=0, marker=None):
+        """
+        Counts the (non blank) data rows of a text file without parsing them, e.g. to plan the output size.
+        :param file_path: input file path
+        :param skip: number of header lines
+        :param marker: text of the last header line, e.g. '****', for headers without a fixed length
+        :return: number of rows
+        """
+        with Opener.open(file_path, 'rb') as f:
+            # lines are read one at a time, holding a single line in memory whatever the file size
+            if marker is not None:
+                marker = marker.encode()
+                if not any(marker in line for line in f):
+                    raise ValueError('Header end {} not found in {}.'.format(marker, file_path))
+            else:
+                for _ in islice(f, skip):
+                    pass
+            return sum(1 for line in f if line.strip())
+
+    @property
+    def n_rows(self):
+        return len(self.lines)
+
+    @property
+    def n_columns(self):
+        """
+        :return: number of columns of the first row.
+        """
+        return len(self.split(self.lines[0])) if self.lines else 0
+
+    def split(self, line):
+        return line.strip().split(self.sep)
+
+    def text(self, index):
+        """
+        Raw (string) column, e.g. timestamps.
+        :param index: column index
+        :return: numpy array of str
+        """
+        return np.array([self.split(line)[index] for line in self.lines])
+
+    def column(self, index, dtype='f8'):
+        """
+        :param index: column index
+        :param dtype: numpy data type, e.g. 'f4' to parse directly to the type of a netcdf 'f4' variable
+        :return: 1-D numpy array
+        """
+        return self.read({index: index}, dtype)[index]
+
+    def columns(self, group, dtype='f8'):
+        """
+        :param group: slice of the column indexes, e.g. slice(5, None, 9)
+        :param dtype: numpy data type
+        :return: 2-D numpy array (rows x columns of the group)
+        """
+        return self.read({0: group}, dtype)[0]
+
+    def read(self, columns, dtype='f8'):
+        """
+        Parses several columns and column groups in a single pass.
+        :param columns: dictionary of name: column index (1-D result) or slice (2-D result)
+        :param dtype: numpy data type of the results
+        :return: dictionary of name: numpy array
+        """
+        n_columns = self.n_columns
+        indexes = {name: list(range(*key.indices(n_columns))) if isinstance(key, slice) else key
+                   for name, key in columns.items()}
+        usecols = sorted({i for index in indexes.values() for i in (index if isinstance(index, list) else [index])})
+        if not usecols:
+            return {name: np.empty((self.n_rows, 0), dtype=dtype) for name in columns}
+        if self.n_rows:
+            values = np.loadtxt(self.numeric_lines(), delimiter=self.sep, dtype=dtype, comments=None,
+                                usecols=usecols, ndmin=2)
+        else:
+            values = np.empty((0, len(usecols)), dtype=dtype)
+
+        position = {column: i for i, column in enumerate(usecols)}
+        return {name: values[:, [position[i] for i in index]] if isinstance(index, list) else values[:, position[index]]
+                for name, index in indexes.items()}
+
+    def numeric_lines(self):
+        """
+        Rows with decimal marks and missing values replaced, so that they can be parsed by numpy.
+        :return: list of str
+        """
+        if self._numeric_lines is None:
+            lines = self.lines
+            if self.decimal != '.' or self.missing_values:
+                text = '\n'.join(line.rstrip('\r\n') for line in lines)
+                if self.decimal != '.':
+                    text = text.replace(self.decimal, '.')
+                if self.missing_values:
+                    sep = r'\s+' if self.sep is None else re.escape(self.sep)
+                    tokens = '|'.join(re.escape(value) for value in self.missing_values)
+                    missing = re.compile(r'(^|{sep})(?:{tokens})(?={sep}|[^\S\n]*$)'.format(sep=sep, tokens=tokens),
+                                         re.MULTILINE)
+                    text = missing.sub(lambda match: match.group(1) + repr(float(self.fill_value)), text)
+                lines = text.splitlines()
+            self._numeric_lines = lines
+        return self._numeric_lines
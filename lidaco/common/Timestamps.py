@@ -0,0 +1,206 @@
+from datetime import datetime
+import numpy as np
+
+
+class Timestamps:
+    """
+    Bulk timestamp conversions to and from numpy datetime64 arrays (microsecond resolution).
+
+    Date strings of a file usually share the same layout, so the format is detected once, from the first value,
+    and the fields (year, month, ...) are read at fixed positions of all the strings at once, instead of calling
+    datetime.strptime for each row. The strings that do not share it are parsed one by one.
+    """
+
+    UNIX_EPOCH = np.datetime64('1970-01-01T00:00:00', 'us')
+    LABVIEW_EPOCH = np.datetime64('1904-01-01T00:00:00', 'us')
+
+    # directive: (field, width) of the strptime directives with a fixed width
+    DIRECTIVES = {
+        'Y': ('year', 4),
+        'm': ('month', 2),
+        'd': ('day', 2),
+        'H': ('hour', 2),
+        'M': ('minute', 2),
+        'S': ('second', 2),
+        'f': ('microsecond', None),
+    }
+
+    @staticmethod
+    def parse(values, formats):
+        """
+        Parses date strings, at once when they share the layout of the first one.
+        :param values: iterable of date strings
+        :param formats: strptime format, or list of candidate formats; the first one matching the first value is
+        tried for all values at once. When they do not share its layout (e.g. fields without zero padding, or
+        formats mixed within a file), each value is parsed with the first candidate matching it.
+        :return: numpy datetime64[us] array
+        """
+        values = np.asarray(values, dtype=str)
+        if len(values) == 0:
+            return np.array([], dtype='datetime64[us]')
+
+        date_format = Timestamps.detect_format(values[0], formats)
+        times = Timestamps.parse_fixed(values, date_format)
+        if times is None:
+            times = np.array([Timestamps.parse_one(value, formats) for value in values], dtype='datetime64[us]')
+        return times
+
+    @staticmethod
+    def parse_one(value, formats):
+        """
+        :param value: date string
+        :param formats: strptime format, or list of candidate formats
+        :return: datetime parsed with the first format matching value
+        """
+        return datetime.strptime(value, Timestamps.detect_format(value, formats))
+
+    @staticmethod
+    def detect_format(value, formats):
+        """
+        :param value: date string
+        :param formats: strptime format, or list of candidate formats
+        :return: the first format parsing value (a single format is returned as is)
+        """
+        if isinstance(formats, str):
+            return formats
+        for date_format in formats:
+            try:
+                datetime.strptime(value, date_format)
+                return date_format
+            except ValueError:
+                pass
+        raise ValueError('time data %r does not match any of the formats %s' % (value, list(formats)))
+
+    @staticmethod
+    def parse_fixed(values, date_format):
+        """
+        Parses date strings of the same length, reading each field at a fixed position.
+        :param values: numpy array of str
+        :param date_format: strptime format, using %Y, %m, %d, %H, %M, %S and (at the end) %f
+        :return: numpy datetime64[us] array, None if the values or the format do not have a fixed layout.
+        """
+        layout = Timestamps.layout(date_format, len(values[0]))
+        if layout is None:
+            return None
+        fields, literals, width = layout
+
+        try:
+            chars = values.astype('S%d' % width)
+        except UnicodeEncodeError:
+            return None
+        if np.any(np.char.str_len(values) != width):
+            return None
+        chars = chars.view(np.uint8).reshape(len(values), width)
+
+        for position, char in literals:
+            if np.any(chars[:, position] != ord(char)):
+                return None
+        digits = chars.astype(np.int64) - ord('0')
+
+        parsed = {'year': 1900, 'month': 1, 'day': 1, 'hour': 0, 'minute': 0, 'second': 0, 'microsecond': 0}
+        for name, start, length in fields:
+            field = digits[:, start:start + length]
+            if np.any((field < 0) | (field > 9)):
+                return None
+            parsed[name] = field @ (10 ** np.arange(length - 1, -1, -1))
+            if name == 'microsecond':
+                parsed[name] *= 10 ** (6 - length)
+
+        try:
+            return Timestamps.from_fields(**parsed)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def layout(date_format, length):
+        """
+        :param date_format: strptime format
+        :param length: length of the date strings, used to get the number of digits of %f
+        :return: ([(field, start, width)], [(position, literal char)], string width),
+        None if the format has directives without a fixed width.
+        """
+        fields = []
+        literals = []
+        position = 0
+        i = 0
+        while i < len(date_format):
+            char = date_format[i]
+            if char == '%':
+                directive = date_format[i + 1:i + 2]
+                if directive not in Timestamps.DIRECTIVES:
+                    return None
+                name, width = Timestamps.DIRECTIVES[directive]
+                if width is None:
+                    # the fraction of a second takes the remaining (1 to 6) digits
+                    width = length - position
+                    if i + 2 != len(date_format) or not 1 <= width <= 6:
+                        return None
+                fields.append((name, position, width))
+                position += width
+                i += 2
+            else:
+                literals.append((position, char))
+                position += 1
+                i += 1
+        return fields, literals, position
+
+    @staticmethod
+    def from_fields(year, month=1, day=1, hour=0, minute=0, second=0, microsecond=0):
+        """
+        Builds timestamps from (arrays of) date and time fields.
+        :return: numpy datetime64[us] array
+        :raises ValueError: if a field is out of range, e.g. 31st of April.
+        """
+        year, month, day, hour, minute, second, microsecond = np.broadcast_arrays(
+            *[np.asarray(field, dtype=np.int64) for field in (year, month, day, hour, minute, second, microsecond)])
+        if (np.any((month < 1) | (month > 12)) or np.any((hour < 0) | (hour > 23)) or
+                np.any((minute < 0) | (minute > 59)) or np.any((second < 0) | (second > 59)) or
+                np.any((microsecond < 0) | (microsecond > 999999))):
+            raise ValueError('Timestamp field out of range.')
+
+        months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+        days = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+        if np.any((day < 1) | (days.astype('datetime64[M]') != months)):
+            raise ValueError('Day is out of range for month.')
+
+        microseconds = ((hour * 60 + minute) * 60 + second) * 1000000 + microsecond
+        return days.astype('datetime64[us]') + microseconds.astype('timedelta64[us]')
+
+    @staticmethod
+    def from_epoch(seconds, epoch=UNIX_EPOCH):
+        """
+        Converts seconds since an epoch to timestamps, e.g. LabVIEW timestamps, counted from 1904-01-01.
+        :param seconds: array of seconds, integer or float
+        :param epoch: numpy datetime64, e.g. Timestamps.LABVIEW_EPOCH
+        :return: numpy datetime64[us] array
+        """
+        seconds = np.asarray(seconds)
+        if np.issubdtype(seconds.dtype, np.integer):
+            offsets = seconds.astype('timedelta64[s]')
+        else:
+            offsets = np.round(seconds * 1e6).astype(np.int64).astype('timedelta64[us]')
+        return np.datetime64(epoch, 'us') + offsets
+
+    @staticmethod
+    def seconds_since(times, start):
+        """
+        :param times: numpy datetime64 array
+        :param start: numpy datetime64
+        :return: float64 array of seconds since start
+        """
+        return (times - start) / np.timedelta64(1, 's')
+
+    @staticmethod
+    def iso8601(times):
+        """
+        Formats timestamps as datetime.isoformat() + 'Z', i.e. yyyy-mm-ddThh:mm:ssZ, with microseconds only if
+        they are not 0.
+        :param times: numpy datetime64 array
+        :return: numpy array of str
+        """
+        times = np.asarray(times, dtype='datetime64[us]')
+        strings = np.datetime_as_string(times, unit='s')
+        fractional = times != times.astype('datetime64[s]')
+        if np.any(fractional):
+            strings = np.where(fractional, np.datetime_as_string(times, unit='us'), strings)
+        return np.char.add(strings, 'Z')
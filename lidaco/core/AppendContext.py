@@ -0,0 +1,36 @@
+class AppendContext:
+    """
+    In-memory state of an output block, shared by the inputs appended to the same (open) output dataset.
+
+    Readers use it to continue the data already written, e.g. numbering scan cycles or rebasing times on the
+    campaign start, instead of reading it back from the output dataset.
+    """
+
+    def __init__(self, appending=False, n_rows=0, variable_options=None, planned_rows=None):
+        """
+        Constructor.
+        :param appending: whether the next input is appended to previous inputs of the output block.
+        :param n_rows: number of rows (along the unlimited dimension) already in the output dataset.
+        :param variable_options: storage options of the output variables, see Writer.variable_options.
+        :param planned_rows: total rows of the output block, counted by the planning pass (Reader.count_rows),
+        for a fixed size dimension; None when the dimension grows with each input.
+        """
+        self.appending = appending
+        self.n_rows = n_rows
+        self.variable_options = variable_options
+        self.planned_rows = planned_rows
+        self.last_scan_cycle = None
+        self.campaign_start = None
+
+    @staticmethod
+    def from_dataset(dataset, appending, variable_options=None):
+        """
+        Context of a dataset written without one, e.g. through Reader.read_to or by a previous conversion.
+        The reader specific state (last scan cycle, campaign start) is unknown, i.e. None.
+        :param dataset: cdm/netcdf4 dataset.
+        :param appending: whether the next input is appended to the data of the dataset.
+        :param variable_options: storage options of the output variables, see Writer.variable_options.
+        :return: AppendContext
+        """
+        unlimited = [dimension for dimension in dataset.dimensions.values() if dimension.isunlimited()]
+        return AppendContext(appending, len(unlimited[0]) if appending and unlimited else 0, variable_options)
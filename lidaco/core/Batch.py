@@ -0,0 +1,148 @@
+from os import path, cpu_count
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import time
+import traceback
+
+from ..common.Logger import Logger
+from .Builder import Builder, ConversionError, _build_block_job
+
+
+class Batch:
+    """
+    Converts the data of several configurations in a single run, e.g. all the instruments of a campaign, whose
+    configurations import the same general/instrument/processing files. The imported files are parsed once
+    (see Config.load_yaml) and the output blocks of all the configurations are converted by a single process
+    pool, which stays busy until the last block instead of waiting for the slowest block of each configuration.
+    """
+
+    def __init__(self, config_files, jobs=1, resume=False, context='', **args):
+        """
+        Constructor.
+        :param config_files: configuration file paths or glob patterns, e.g. configs/NEWA_Kassel_*.yaml
+        :param jobs: number of processes converting the output blocks (0 uses all cpus)
+        :param resume: skip (or append to) the output blocks recorded in the output directories manifests
+        :param context: path to which relative paths, such as the configuration files, are resolved
+        :param args: other Builder arguments (input_path, input_format, output_format, since, until), applied to all the
+        configurations.
+        """
+        self.config_files = Batch.expand(config_files, context)
+        self.jobs = jobs if jobs else cpu_count()
+        self.resume = resume
+        self.context = context
+        self.args = args
+
+    @staticmethod
+    def expand(patterns, context=''):
+        """
+        :param patterns: file paths or glob patterns
+        :param context: path to which relative patterns are resolved
+        :return: the absolute paths of the matching files, sorted per pattern and without duplicates.
+        """
+        files = []
+        for pattern in patterns:
+            pattern = path.abspath(path.join(context, pattern))
+            for config_file in (sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]):
+                if config_file not in files:
+                    files.append(config_file)
+        return files
+
+    def run(self):
+        """
+        Loads each configuration and lists its output blocks, then converts all of them and prints a summary.
+        A configuration failing to load, or an output block failing to convert, is reported without stopping
+        the conversion of the others.
+        :return: [{'config': file, 'blocks': n, 'up_to_date': n, 'converted': n, 'failed': n, 'loaded': bool}]
+        """
+        started = time.perf_counter()
+        results = []
+        jobs = []
+        for config_file in self.config_files:
+            result = {'config': config_file, 'blocks': 0, 'up_to_date': 0, 'converted': 0, 'failed': 0,
+                      'loaded': False}
+            results.append(result)
+            Logger.log('batch_config', config_file)
+            try:
+                builder = Builder(config_file=config_file, context=self.context, **self.args)
+                reader, input_path, output_path = builder.prepare()
+                files = reader.fetch_input_files(input_path)
+                pending = builder.pending_blocks(reader, files, input_path, output_path, self.resume)
+            except SystemExit:
+                # reported by the Logger, which ends the program when run for a single configuration
+                continue
+            except Exception as e:
+                Logger.debug(traceback.format_exc())
+                Logger.warn('batch_load_failed', config_file, repr(e))
+                continue
+            result['loaded'] = True
+            result['blocks'] = len(builder.output_blocks(files))
+            result['up_to_date'] = result['blocks'] - len(pending)
+            config = {'result': result, 'builder': builder, 'reader': reader, 'input_path': input_path,
+                      'output_path': output_path}
+            jobs += [(config,) + block for block in pending]
+
+        if self.jobs > 1 and len(jobs) > 1:
+            n_jobs = min(self.jobs, len(jobs))
+            Logger.info('parallel_blocks', len(jobs), n_jobs)
+            with ProcessPoolExecutor(n_jobs, initializer=Logger.set_args, initargs=(Logger.get_args(),)) as pool:
+                futures = [pool.submit(_build_block_job, config['builder'], config['reader'], block,
+                                       config['input_path'], config['output_path'], converted)
+                           for config, block, _, _, converted in jobs]
+                # messages are printed in block order, so the output reads as the sequential one
+                for future, job in zip(futures, jobs):
+                    lines, error = future.result()
+                    Logger.replay(lines)
+                    Batch.done(job, error)
+        else:
+            for job in jobs:
+                config, block, _, _, converted = job
+                try:
+                    config['builder'].build_block(config['reader'], block, config['input_path'],
+                                                  config['output_path'], converted=converted)
+                    Batch.done(job, None)
+                except ConversionError as e:
+                    Batch.done(job, e)
+
+        Batch.summary(results, time.perf_counter() - started)
+        return results
+
+    @staticmethod
+    def done(job, error):
+        """
+        Records a converted output block in its manifest, or reports its error.
+        :param job: (configuration, block, outputs, inputs, converted), see Builder.pending_blocks
+        :param error: ConversionError, None if the block was converted
+        :return: void
+        """
+        config, _, outputs, inputs, converted = job
+        result = config['result']
+        if error is None:
+            Builder.record(outputs, inputs, converted)
+            result['converted'] += 1
+        else:
+            Logger.debug(error.details)
+            Logger.warn('failed_group', error.files, error.cause)
+            result['failed'] += 1
+
+    @staticmethod
+    def summary(results, seconds):
+        """
+        Prints the output blocks converted, up to date and failed of each configuration, and the totals.
+        :param results: as returned by run
+        :param seconds: duration of the run
+        :return: void
+        """
+        Logger.log('batch_summary_header')
+        for result in results:
+            if result['loaded']:
+                Logger.log('batch_summary_config', path.basename(result['config']), result['converted'],
+                           result['up_to_date'], result['failed'])
+            else:
+                Logger.log('batch_summary_not_loaded', path.basename(result['config']))
+        Logger.log('batch_summary_total', len(results), sum(result['converted'] for result in results),
+                   sum(result['up_to_date'] for result in results), sum(result['failed'] for result in results),
+                   seconds)
+
+        failed = sum(1 for result in results if result['failed'] or not result['loaded'])
+        if failed:
+            Logger.error('batch_failed', failed, len(results))
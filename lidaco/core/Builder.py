@@ -1,23 +1,52 @@
-from os import path
+from os import path, cpu_count, scandir
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from collections import deque
+from contextlib import ExitStack
 import pathlib
+import traceback
+import copy
+import time
+import numpy as np
 
 from lidaco.core.Writer import Writer
 
 from lidaco.core.Reader import Reader
+from lidaco.core.AppendContext import AppendContext
+from lidaco.core.Manifest import Manifest
+from lidaco.core.ParseCache import ParseCache
 
-from ..common.Utils import is_str
+from ..common.Utils import is_str, dict_merge, map_recursively
 from ..common.Logger import Logger
+from ..common.Opener import Opener
 from .ModuleLoader import ModuleLoader
 from .Config import Config
 
 
+class ConversionError(Exception):
+    """
+    Raised when an input file/group could not be converted.
+    """
+
+    def __init__(self, files, cause, details=''):
+        """
+        :param files: the input file(s) of the failing group
+        :param cause: native error message
+        :param details: native error traceback
+        """
+        super().__init__(files, cause, details)
+        self.files = files
+        self.cause = cause
+        self.details = details
+
+
 class Builder:
     """
     Main class. Orchestrates all the conversion steps.
 
     """
 
-    module_loader = ModuleLoader()
+    module_loader = None
     logger = None
     input_dir_path = None
     configs = {}
@@ -29,23 +58,31 @@ class Builder:
                  output_format=None,
                  input_format=None,
                  context='',
+                 jobs=1,
+                 resume=False,
+                 since=None,
+                 until=None,
+                 configs=None,
                  ):
         """
         Initialization block. Loads a main config.yaml file, a reader, a writer and the remaining
         "meta-data" configurations. Overrides main configurations with the terminal arguments.
         :param context: this executable path
         :param args: terminal arguments
+        :param jobs: number of processes used to convert output blocks in parallel (0 uses all cpus)
+        :param resume: skip the output blocks whose inputs did not change since the last conversion, as recorded
+        in the output directory manifest
+        :param since: only convert the input files whose name time is at or after this time, e.g. 2019-03-08
+        :param until: only convert the input files whose name time is before this time
+        :param configs: configurations dictionary (whose imports are resolved against the context) or Config
+        instance, used instead of a config file, e.g. by Converter. An input path is then optional.
         :return: void
         """
-
-        absolute_path = path.join(context, config_file)
-        import_dir_path = path.dirname(absolute_path)
-        import_filename = path.basename(absolute_path)
+        self.module_loader = ModuleLoader()
+        self.jobs = jobs if jobs else cpu_count()
+        self.resume = resume
 
         root_configs = {
-            'imports': [
-                import_filename
-            ],
             'parameters': {
                 'input': {},
                 'output': {}
@@ -61,13 +98,32 @@ class Builder:
         if output_format is not None:
             root_configs['parameters']['output']['format'] = output_format
 
-        self.configs = Config(import_dir_path, configs=root_configs)
+        if since is not None:
+            root_configs['parameters']['input']['since'] = since
+
+        if until is not None:
+            root_configs['parameters']['input']['until'] = until
+
+        if isinstance(configs, Config):
+            self.configs = configs
+            self.configs.merge(root_configs)
+            dict_merge(self.configs.config_paths, map_recursively(root_configs, context))
+        elif configs is not None:
+            configs = copy.deepcopy(configs)
+            dict_merge(configs, root_configs)
+            self.configs = Config(context, configs=configs)
+        else:
+            absolute_path = path.join(context, config_file)
+            import_dir_path = path.dirname(absolute_path)
+            root_configs['imports'] = [path.basename(absolute_path)]
+            self.configs = Config(import_dir_path, configs=root_configs)
 
         try:
             self.input_dir_path = path.join(context, self.params('input', 'path'))
         except Exception as e:
-            Logger.debug(e)
-            Logger.error('inp_path_missing')
+            if configs is None:
+                Logger.debug(e)
+                Logger.error('inp_path_missing')
 
         try:
             self.configs.get('parameters', 'output', 'path')
@@ -91,23 +147,59 @@ class Builder:
                 Logger.debug(e)
                 Logger.error('bad_inp_format', self.params('input', 'format'), str(e))
 
-        writer = self.params('output', 'format')
-        if not is_str(writer) and issubclass(writer, Writer):
-            self.module_loader.set_writer(writer)
-        else:
-            try:
-                self.module_loader.load_writer(writer)
-                Logger.info('output_format_detected', self.params('output', 'format'))
-            except KeyError as e:
-                Logger.debug(e)
-                Logger.error('out_format_missing')
-            except Exception as e:
-                Logger.debug(e)
-                Logger.error('bad_out_format', self.params('output', 'format'), str(e))
+        try:
+            writers = [output['format'] if isinstance(output, dict) else output for output in self.output_formats()]
+            if not writers:
+                raise KeyError('format')
+        except KeyError as e:
+            Logger.debug(e)
+            Logger.error('out_format_missing')
+
+        for writer in writers:
+            if not is_str(writer) and issubclass(writer, Writer):
+                self.module_loader.add_writer(writer)
+            else:
+                try:
+                    self.module_loader.load_writer(writer)
+                    Logger.info('output_format_detected', writer)
+                except Exception as e:
+                    Logger.debug(e)
+                    Logger.error('bad_out_format', writer, str(e))
 
     def params(self, *keys):
         return self.configs.get('parameters', *keys)
 
+    def output_formats(self):
+        """
+        Reads the output/format config: a writer name, or a list of them to write each output block in several
+        formats from a single parsing of the input files. Each item of the list may also set its own output
+        path (relative to the configuration file), instead of the output/path config, e.g.
+
+            output:
+              format:
+                - NetCDF4
+                - format: NcML
+                  path: ncml
+              path: output
+
+        :return: list of output formats, each a writer name (or class) or a {format, path} dictionary
+        """
+        formats = self.params('output', 'format')
+        return list(formats) if isinstance(formats, list) else [formats]
+
+    def outputs(self, output_path):
+        """
+        :param output_path: output files directory
+        :return: [(writer class, output directory, output format config)] of each output format
+        """
+        outputs = []
+        for writer, output_format in zip(self.module_loader.get_writers(), self.output_formats()):
+            directory = output_path
+            if isinstance(output_format, dict) and output_format.get('path') is not None:
+                directory = path.join(self.configs.get_path('parameters', 'output', 'format'), output_format['path'])
+            outputs.append((writer, directory, output_format))
+        return outputs
+
     def read_attributes(self, dataset):
         """
         Reads attributes into the dataset. The attributes should be specified in the .yaml configuration
@@ -137,55 +229,630 @@ class Builder:
                             setattr(temp_var, key, value)
 
 
-    def build(self):
+    def output_blocks(self, files):
         """
-        Main loop - connects the reader with the writer.
-        Iterates over input data files / file groups:
-        - Reading meta attributes from "meta-data" configurations
-        :return:
+        Splits the input files/groups into output blocks, as specified by output_block_size.
+        Each block is written to a single output file.
+        :param files: input files/groups as returned by fetch_input_files
+        :return: list of blocks, each a list of input files/groups
+        """
+        obs = self.params('output_block_size') if self.configs.exists('parameters', 'output_block_size') else 1
+        if obs is None:
+            obs = len(files)
+
+        return [files[i:i + obs] for i in range(0, len(files), obs)]
+
+    def presize_dimensions(self):
+        """
+        :return: whether output/presize_dimensions is set, i.e. output blocks are planned before being written.
+        """
+        return bool(self.configs.exists('parameters', 'output', 'presize_dimensions') and
+                    self.params('output', 'presize_dimensions'))
+
+    def plan_block(self, reader, paths, pool=None):
+        """
+        Planning pass of an output block: counts the rows of each of its inputs, reading only their headers,
+        so that the unlimited dimension is created with its final size and each input is written into its
+        own slice of it.
+        :param reader: reader instance
+        :param paths: input files/groups paths of the block
+        :param pool: optional process pool, to count the rows concurrently
+        :return: total number of rows, None if the reader cannot count the rows of an input.
         """
-        writer = None
-        out_complete = ''
+        if not reader.can_parse():
+            return None
+        if pool is not None:
+            counts = list(pool.map(reader.count_rows, paths))
+        else:
+            counts = [reader.count_rows(complete_path) for complete_path in paths]
+        if any(count is None for count in counts):
+            return None
+        return sum(counts) or None
+
+    def parser(self, reader):
+        """
+        :param reader: reader instance
+        :return: the function parsing an input file/group into a LidarBlock: the reader parse, or the parse
+        cache one when parameters/parse_cache is configured.
+        """
+        if ParseCache.enabled(self.configs):
+            return ParseCache(reader, self.configs).parse
+        return reader.parse
 
+    def parse_blocks(self, reader, parse, complete_path):
+        """
+        :param reader: reader instance
+        :param parse: parse function, see parser
+        :param complete_path: input file path, or tuple of paths of a group
+        :return: the blocks an input is parsed into and appended in order: when the input/max_rows or
+        input/memory_budget config is set and the reader implements it (see Reader.chunked), the
+        Reader.iter_blocks generator, which reads the next block when the previous one is written (the parse cache
+        is then not used); otherwise the single block returned by parse.
+        """
+        if reader.chunked():
+            return reader.iter_blocks(complete_path, True)
+        return [parse(complete_path)]
+
+    def block_paths(self, reader, block, input_path):
+        """
+        :param reader: reader instance
+        :param block: list of input files/groups
+        :param input_path: input files directory
+        :return: the complete path of each input file, or tuple of paths of each group.
+        """
+        if reader.data_grouping:
+            return [tuple([path.join(input_path, f) for f in group['files']]) for group in block]
+        return [path.join(input_path, group['files']) for group in block]
+
+    def block_writers(self, reader, block, output_path):
+        """
+        :param reader: reader instance
+        :param block: list of input files/groups
+        :param output_path: output files directory
+        :return: writer instances of the output block, one per output format
+        """
+        writers = []
+        for writer_class, directory, _ in self.outputs(output_path):
+            writer = writer_class(directory, reader.output_filename(block[0]['id']))
+            writer.set_configs(self.configs)
+            writers.append(writer)
+        return writers
+
+    def build_block(self, reader, block, input_path, output_path, pool=None, converted=0):
+        """
+        Converts an output block, i.e. reads each of its input files/groups into the same output file (one per
+        output format). Each input is parsed once and written by all the writers.
+        The output datasets are opened once for the whole block (and written/flushed when they are closed), the
+        inputs being appended to them together with an AppendContext per writer that carries the state of the
+        block.
+        :param reader: reader instance
+        :param block: list of input files/groups
+        :param input_path: input files directory
+        :param output_path: output files directory
+        :param pool: optional process pool. When given, the input files are parsed concurrently
+        and appended, in order, to the output file.
+        :param converted: number of leading inputs of the block already in the output file (written by a
+        previous conversion), the remaining ones being appended to it; a list, one per output format, or the same
+        number for all of them. The output formats with all the inputs converted are not written.
+        :return: void
+        """
+        writers = self.block_writers(reader, block, output_path)
+        if not isinstance(converted, (list, tuple)):
+            converted = [converted] * len(writers)
+        writers = [(writer, done) for writer, done in zip(writers, converted) if done < len(block)]
+        if not writers:
+            return
+        start = min(done for _, done in writers)
+        inputs = list(zip(block, self.block_paths(reader, block, input_path)))[start:]
+        paths = [complete_path for _, complete_path in inputs]
+
+        group = inputs[0][0]
+        try:
+            planned_rows = None
+            if self.presize_dimensions() and not start:
+                planned_rows = self.plan_block(reader, paths, pool)
+            if planned_rows is not None:
+                for writer, _ in writers:
+                    Logger.log('planned_rows', planned_rows, writer.file_path())
+
+            parse = self.parser(reader)
+            parsed = None
+            if pool is not None and not reader.chunked():
+                # inputs parsed in blocks of bounded rows are parsed as they are written instead
+                parsed = _ordered_map(pool, parse, paths, 2 * self.jobs)
+
+            with ExitStack() as stack:
+                outputs = []
+                for writer, done in writers:
+                    dataset = stack.enter_context(writer.appending(done > 0))
+                    if done:
+                        context = AppendContext.from_dataset(dataset, True, writer.variable_options)
+                    else:
+                        self.read_attributes(dataset)
+                        self.read_variables(dataset)
+                        context = AppendContext(variable_options=writer.variable_options, planned_rows=planned_rows)
+                    outputs.append((writer, done, dataset, context))
+
+                for i, (group, complete_path) in enumerate(inputs, start):
+                    Logger.log('started_r_files', group['files'])
+
+                    parsed_blocks = [None]
+                    if parsed is not None:
+                        parsed_blocks = [next(parsed)]
+                    elif reader.can_parse():
+                        parsed_blocks = self.parse_blocks(reader, parse, complete_path)
+
+                    for j, parsed_block in enumerate(parsed_blocks):
+                        if not i and not j and planned_rows is None and reader.chunked() and \
+                                parsed_block.n_rows() == parsed_block.info.get('max_rows'):
+                            # the variables are created with the chunk sizes of the whole input, as when it is
+                            # parsed at once; the rows are only counted for the first input of an output
+                            # which is not presized
+                            parsed_block.info['input_rows'] = reader.count_rows(complete_path)
+                        for writer, done, dataset, context in outputs:
+                            if i < done:
+                                continue
+                            # the chunks of an input are appended to its first one
+                            context.appending = i > 0 or j > 0
+                            if not j:
+                                Logger.log('writing_file', writer.file_path(), '(appending)' if i > 0 else '')
+
+                            if reader.can_parse():
+                                reader.emit(dataset, parsed_block, context)
+                            else:
+                                reader.read_to(dataset, complete_path, self.configs, context.appending)
+                        # released before the next block is parsed
+                        parsed_block = None
+
+                for _, _, _, context in outputs:
+                    if planned_rows is not None and context.n_rows != planned_rows:
+                        raise ValueError('Planned {} rows, but the inputs had {}.'.format(planned_rows,
+                                                                                          context.n_rows))
+        except Exception as e:
+            raise ConversionError(group['files'], repr(e), traceback.format_exc()) from e
+
+    def prepare(self):
+        """
+        Instantiates and verifies the reader, verifies the writers storage options and creates the output
+        directory. Configuration errors are thus reported before converting, and not from the workers of a
+        parallel conversion.
+        :return: (reader, input path (None if not configured), output path)
+        """
         reader = self.module_loader.get_reader()()
         reader.set_configs(self.configs)
+        reader.metadata_only = all(writer.metadata_only for writer in self.module_loader.get_writers())
         reader.verify_parameters()
-        input_path = self.configs.get_resolved('parameters', 'input', 'path')
+        input_path = None
+        if self.configs.exists('parameters', 'input', 'path'):
+            input_path = self.configs.get_resolved('parameters', 'input', 'path')
         output_path = self.configs.get_resolved('parameters', 'output', 'path')
-        pathlib.Path(output_path).mkdir(parents=True, exist_ok=True)
-        
+        for writer_class, directory, _ in self.outputs(output_path):
+            writer = writer_class(directory, None)
+            writer.set_configs(self.configs)
+            writer.storage()
+            pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        return reader, input_path, output_path
+
+    def build(self):
+        """
+        Main loop - connects the reader with the writer.
+        Iterates over input data files / file groups:
+        - Reading meta attributes from "meta-data" configurations
+        :return:
+        """
+        reader, input_path, output_path = self.prepare()
         files = reader.fetch_input_files(input_path)
 
-        for i, group in enumerate(files):
+        try:
+            self.convert(reader, files, input_path, output_path, self.resume)
+        except ConversionError as e:
+            Logger.debug(e.details)
+            Logger.error('failed_group', e.files, e.cause)
 
-            obs = self.params('output_block_size') if self.configs.exists('parameters', 'output_block_size') else 1
-            if obs is None:
-                obs = len(files)
+        Logger.info('done')
 
-            first_of_batch = (i % obs == 0)
+    def build_files(self, files=None, resume=False):
+        """
+        Converts the given input files, instead of all the files of the input path, e.g. for the conversion
+        server. Errors are raised rather than ending the program.
+        :param files: input file paths, relative ones being resolved against the input path; None converts all
+        the files of the input path.
+        :param resume: whether to skip (or append to) the output blocks recorded in the manifest
+        :return: the output files written
+        :raises ConversionError: if an input file/group fails to be converted
+        """
+        reader, input_path, output_path = self.prepare()
+        if files is None:
+            return self.convert(reader, reader.fetch_input_files(input_path), input_path, output_path, resume)
+
+        directories = {}
+        for f in files:
+            complete_path = path.join(input_path, f)
+            directories.setdefault(path.dirname(complete_path), []).append(path.basename(complete_path))
+
+        outputs = []
+        for directory, names in directories.items():
+            names = [name for name in names if reader.accepts_file(Opener.name(name))]
+            if names:
+                outputs += self.convert(reader, reader.group_input_files(names), directory, output_path, resume)
+        return outputs
+
+    def convert(self, reader, files, input_path, output_path, resume=False):
+        """
+        Converts input files/groups, split into output blocks.
+        When more than one job is requested, either the output blocks are converted in a process pool or,
+        when there are fewer blocks than jobs and the reader supports it, the input files of each block are
+        parsed in a process pool while a single writer appends them in order.
+        Converted output blocks are recorded in a manifest in the output directory. When resuming, the blocks
+        whose output exists and whose inputs (size, modification time) and configurations did not change are
+        skipped, and new inputs of a block are appended to its output when the writer supports it.
+        The parse cache, when configured, is trimmed to its maximum size once the blocks are converted.
+        :param reader: reader instance
+        :param files: input files/groups as returned by fetch_input_files
+        :param input_path: input files directory
+        :param output_path: output files directory
+        :param resume: whether to skip (or append to) the output blocks recorded in the manifest
+        :return: the output files written
+        :raises ConversionError: if an input file/group fails to be converted
+        """
+        pending = self.pending_blocks(reader, files, input_path, output_path, resume)
+
+        if self.jobs > 1 and len(pending) > 1 and (len(pending) >= self.jobs or not reader.can_parse()):
+            jobs = min(self.jobs, len(pending))
+            Logger.info('parallel_blocks', len(pending), jobs)
+            with ProcessPoolExecutor(jobs, initializer=Logger.set_args, initargs=(Logger.get_args(),)) as pool:
+                futures = [pool.submit(_build_block_job, self, reader, block, input_path, output_path, converted)
+                           for block, _, _, converted in pending]
+                # messages are printed in block order, so the output reads as the sequential one
+                for future, (_, outputs, inputs, converted) in zip(futures, pending):
+                    lines, error = future.result()
+                    Logger.replay(lines)
+                    if error is not None:
+                        pool.shutdown(cancel_futures=True)
+                        raise error
+                    Builder.record(outputs, inputs, converted)
+        elif self.jobs > 1 and reader.can_parse() and pending:
+            Logger.info('parallel_parsing', self.jobs)
+            # workers are started while the output file is open: forking would share the HDF5 state
+            with ProcessPoolExecutor(self.jobs, multiprocessing.get_context('spawn'),
+                                     initializer=Logger.set_args, initargs=(Logger.get_args(),)) as pool:
+                for block, outputs, inputs, converted in pending:
+                    self.build_block(reader, block, input_path, output_path, pool, converted)
+                    Builder.record(outputs, inputs, converted)
+        else:
+            for block, outputs, inputs, converted in pending:
+                self.build_block(reader, block, input_path, output_path, converted=converted)
+                Builder.record(outputs, inputs, converted)
 
-            if first_of_batch:
-                output_name = reader.output_filename(group['id'])
-                writer = self.module_loader.get_writer()(output_path, output_name)
-                out_complete = writer.file_path()
+        if ParseCache.enabled(self.configs) and pending:
+            ParseCache(reader, self.configs).evict()
 
-            Logger.log('started_r_files', group['files'])
+        return [output_file for _, outputs, inputs, converted in pending
+                for (_, output_file), done in zip(outputs, converted) if done < len(inputs)]
 
-            with writer.appending(not first_of_batch) as dataset:
-                Logger.log('writing_file', out_complete, '' if first_of_batch else '(appending)')
-                
-                self.read_attributes(dataset)
-                self.read_variables(dataset)
-                
-                if reader.data_grouping:
-                    complete_path = tuple([path.join(input_path, f) for f in group['files']])
-                else:
-                    complete_path = path.join(input_path, group['files'])
-                reader.read_to(dataset, complete_path, self.configs, not first_of_batch)
+    def pending_blocks(self, reader, files, input_path, output_path, resume=False):
+        """
+        Splits the input files/groups into output blocks and selects those to convert.
+        :param reader: reader instance
+        :param files: input files/groups as returned by fetch_input_files
+        :param input_path: input files directory
+        :param output_path: output files directory
+        :param resume: whether to skip (or append to) the output blocks recorded in the manifests
+        :return: [(block, [(output directory Manifest, output file)] of each output format, inputs as recorded in
+        the manifest, [number of inputs already converted] of each output format)] of the blocks to convert
+        """
+        blocks = self.output_blocks(files)
+        appendable = reader.can_parse() and not self.presize_dimensions()
+
+        manifests = [self.manifest(directory, output_format)
+                     for _, directory, output_format in self.outputs(output_path)]
+        pending = []
+        for block in blocks:
+            inputs = Manifest.inputs(self.block_paths(reader, block, input_path))
+            outputs = []
+            converted = []
+            for writer, manifest in zip(self.block_writers(reader, block, output_path), manifests):
+                output_file = writer.file_path()
+                done = manifest.converted(output_file, inputs) if resume else 0
+                if done == len(inputs):
+                    Logger.info('up_to_date', output_file)
+                elif not (appendable and writer.appendable):
+                    done = 0
+                outputs.append((manifest, output_file))
+                converted.append(done)
+            if any(done < len(inputs) for done in converted):
+                pending.append((block, outputs, inputs, converted))
+        if resume and pending:
+            Logger.info('resuming', len(blocks) - len(pending), len(blocks))
+        return pending
+
+    @staticmethod
+    def record(outputs, inputs, converted):
+        """
+        Records the outputs of a converted block in their manifests.
+        :param outputs: [(Manifest, output file)] of each output format, see pending_blocks
+        :param inputs: the block inputs, as returned by Manifest.inputs
+        :param converted: [number of inputs already converted] of each output format, the up to date outputs
+        not being recorded again
+        :return: void
+        """
+        for (manifest, output_file), done in zip(outputs, converted):
+            if done < len(inputs):
+                manifest.record(output_file, inputs)
 
-        Logger.info('done')
+    def manifest(self, output_path, output_format=None):
+        """
+        :param output_path: output files directory
+        :param output_format: output format config of the outputs, when several are configured: the outputs of
+        each format are recorded with the configurations of that format only, so that adding or removing
+        another format does not make them out of date
+        :return: Manifest of the output directory, for the current configurations
+        """
+        configs = self.configs.configs
+        if output_format is not None and isinstance(self.params('output', 'format'), list):
+            output = dict(configs['parameters']['output'], format=output_format)
+            configs = dict(configs, parameters=dict(configs['parameters'], output=output))
+        return Manifest(output_path, Manifest.digest(configs), Manifest.data_digest(configs))
+
+    def restamp(self):
+        """
+        Restamp mode: applies the attributes and variables configurations to the existing outputs, without
+        reading the input files again, e.g. after editing metainfo.yaml. The outputs are found in the output
+        directories (see restamp_outputs), so the input files may have been archived or removed. Each output is
+        opened for appending
+        and only the global attributes, variables and variable attributes that differ from the configurations
+        are written. Attributes removed from the configurations are kept, as are the attributes that the reader
+        sets from the input files (Reader.data_attributes). The outputs are restamped in parallel when more than
+        one job is requested. Of several output formats, those whose writer cannot append are left unchanged.
+        :return: void
+        """
+        reader, input_path, output_path = self.prepare()
+        targets = self.outputs(output_path)
+        for writer, _, output_format in targets:
+            if not writer.appendable:
+                name = output_format.get('format') if isinstance(output_format, dict) else output_format
+                if not any(target[0].appendable for target in targets):
+                    Logger.error('restamp_unsupported', name)
+                Logger.warn('restamp_skipped', name)
+
+        manifests = [self.manifest(directory, output_format) for _, directory, output_format in targets]
+        outputs = self.restamp_outputs(input_path, output_path)
+
+        if self.jobs > 1 and len(outputs) > 1:
+            jobs = min(self.jobs, len(outputs))
+            with ProcessPoolExecutor(jobs, initializer=Logger.set_args, initargs=(Logger.get_args(),)) as pool:
+                futures = [pool.submit(_restamp_output_job, self, reader, output_file, output_path, index)
+                           for index, output_file in outputs]
+                results = [future.result() for future in futures]
+        else:
+            results = [_restamp_output_job(self, reader, output_file, output_path, index)
+                       for index, output_file in outputs]
+
+        restamped = 0
+        for (lines, changes, error), (index, output_file) in zip(results, outputs):
+            Logger.replay(lines)
+            if isinstance(error, SystemExit):
+                raise error
+            if error is not None:
+                Logger.debug(error.details)
+                Logger.warn('failed_group', error.files, error.cause)
+                continue
+            if changes:
+                restamped += 1
+                Logger.log('restamped', output_file, ', '.join(changes))
+            else:
+                Logger.info('restamp_unchanged', output_file)
+            if not manifests[index].restamped(output_file):
+                Logger.warn('restamp_stale', output_file)
+        Logger.log('restamp_done', restamped, len(outputs))
+
+    def restamp_outputs(self, input_path, output_path):
+        """
+        Output files of the appendable output formats to restamp. In an output directory with a manifest, those
+        recorded as converted with the current data configurations (see Manifest.data_digest) or from input files
+        of the input path, i.e. by this configuration, other configurations possibly sharing the directory;
+        otherwise, e.g. converted before the manifests were written, all the files of the output format.
+        :param input_path: input files directory, None if not configured
+        :param output_path: output files directory
+        :return: [(index of the output format, output file path)]
+        """
+        outputs = []
+        for index, (writer_class, directory, output_format) in enumerate(self.outputs(output_path)):
+            if not writer_class.appendable or not path.isdir(directory):
+                continue
+            manifest = self.manifest(directory, output_format)
+            if path.exists(manifest.file_path):
+                names = [name for name, record in manifest.outputs.items()
+                         if record.get('data_digest') == manifest.data_digest or
+                         Builder.converted_from(record, input_path)]
+            else:
+                extension = writer_class(directory, '').filename()
+                with scandir(directory) as entries:
+                    names = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(extension)]
+            outputs += [(index, path.join(directory, name)) for name in sorted(names)
+                        if path.isfile(path.join(directory, name))]
+        return outputs
+
+    @staticmethod
+    def converted_from(record, input_path):
+        """
+        :param record: manifest record of an output file
+        :param input_path: input files directory, None if not configured
+        :return: whether the output file was converted from input files of the input path
+        """
+        if input_path is None:
+            return False
+        input_path = path.abspath(input_path)
+        files = [f[0] for group in record.get('inputs', []) for f in group]
+        return bool(files) and all(path.commonpath([input_path, path.abspath(f)]) == input_path for f in files)
+
+    def restamp_output(self, reader, output_file, output_path, index=0):
+        """
+        Applies the attributes and variables configurations to an output file, see restamp.
+        :param reader: reader instance
+        :param output_file: output file path
+        :param output_path: output files directory
+        :param index: index of the output format, of several
+        :return: names of the changed attributes and variables (variable attributes as variable.attribute)
+        :raises ConversionError: if the output file fails to be restamped
+        """
+        writer_class, directory, _ = self.outputs(output_path)[index]
+        name = path.basename(output_file)
+        writer = writer_class(path.dirname(output_file), name[:len(name) - len(writer_class(directory, '').filename())])
+        writer.set_configs(self.configs)
+        changes = []
+        try:
+            with writer.appending(True) as dataset:
+                if 'attributes' in self.configs:
+                    for key, value in self.configs['attributes'].items():
+                        if key in reader.data_attributes:
+                            continue
+                        if key not in dataset.ncattrs() or not Builder.same_value(dataset.getncattr(key), value):
+                            setattr(dataset, key, value)
+                            changes.append(key)
+
+                if 'variables' in self.configs:
+                    existing = set(dataset.variables)
+                    self.read_variables(dataset)
+                    for variable_name, variable_dict in self.configs['variables'].items():
+                        if variable_name not in existing:
+                            changes.append(variable_name)
+                            continue
+
+                        variable = dataset.variables[variable_name]
+                        if variable.dtype != np.dtype(variable_dict['data_type']):
+                            Logger.warn('restamp_data_type', variable_name, writer.file_path())
+                            continue
+                        if not Builder.same_value(variable[:], variable_dict['value'], variable.dtype):
+                            variable[:] = variable_dict['value']
+                            changes.append(variable_name)
+                        for key, value in variable_dict.items():
+                            if key not in ('data_type', 'value') and (
+                                    key not in variable.ncattrs() or
+                                    not Builder.same_value(variable.getncattr(key), value)):
+                                setattr(variable, key, value)
+                                changes.append(variable_name + '.' + key)
+        except Exception as e:
+            raise ConversionError(writer.file_path(), repr(e), traceback.format_exc()) from e
+        return changes
+
+    @staticmethod
+    def same_value(current, value, dtype=None):
+        """
+        :param current: attribute or variable value read from a dataset
+        :param value: configured value
+        :param dtype: data type the value is stored with, e.g. of a variable
+        :return: whether both are equal, once stored, e.g. True is stored as 1.
+        """
+        try:
+            current, value = np.asarray(current), np.asarray(value, dtype=dtype)
+            return current.shape == value.shape and bool(np.all(current == value))
+        except (TypeError, ValueError):
+            return False
+
+    def watch(self, interval=10):
+        """
+        Watch mode: polls the input directory and converts the input files as they land, keeping the
+        configurations, reader and writer loaded. A file is converted once it is complete, i.e. its size and
+        modification time did not change since the previous poll (or it is older than the interval). New
+        files are appended to the output block they belong to, as recorded in the output manifest.
+        Runs until interrupted (Ctrl+C); failing inputs are reported and skipped until they change.
+        :param interval: seconds between polls
+        :return: void
+        """
+        reader, input_path, output_path = self.prepare()
+        Logger.log('watching', input_path, interval)
+
+        previous = {}
+        failed = {}
+        try:
+            while True:
+                files, previous = self.stable_files(reader, input_path, previous, interval)
+                files = [f for f in files if failed.get(f) != previous[f]]
+                if files:
+                    try:
+                        self.convert(reader, reader.group_input_files(files), input_path, output_path, True)
+                    except ConversionError as e:
+                        Logger.debug(e.details)
+                        Logger.warn('failed_group', e.files, e.cause)
+                        for f in ([e.files] if is_str(e.files) else e.files):
+                            failed[f] = previous.get(f)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            Logger.info('done')
+
+    @staticmethod
+    def stable_files(reader, input_path, previous, interval):
+        """
+        Lists the complete input files of the input directory.
+        :param reader: reader instance, whose scan_input_files lists and filters the files
+        :param input_path: input files directory
+        :param previous: {file path: (size, modification time)} of the previous poll
+        :param interval: seconds between polls
+        :return: (paths, relative to the input directory, of the files whose size and modification time did not
+        change since the previous poll or that are older than the interval, {file path: (size, modification time)}
+        of this poll)
+        """
+        now = time.time_ns()
+        current = {}
+        for relative_path, entry in reader.scan_input_files(input_path):
+            status = entry.stat()
+            current[relative_path] = (status.st_size, status.st_mtime_ns)
+
+        stable = [name for name, signature in current.items()
+                  if previous.get(name) == signature or signature[1] < now - interval * 1e9]
+        return stable, current
+
+
+def _ordered_map(pool, fn, items, window):
+    """
+    Maps fn over items in a process pool, yielding the results in the items order.
+    At most "window" items are submitted ahead of the consumer, which bounds the
+    memory held by results waiting to be consumed.
+    :param pool: process pool
+    :param fn: picklable function
+    :param items: iterable of arguments
+    :param window: maximum number of pending results
+    :return: results generator
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _build_block_job(builder, reader, block, input_path, output_path, converted=0):
+    """
+    Process pool entry point. Converts an output block buffering the Logger messages,
+    which are returned to the main process together with the conversion error, if any.
+    Configuration errors end the program through Logger.error: the SystemExit is returned too,
+    so that the main process prints the error message before raising it.
+    :return: (messages, ConversionError | SystemExit | None)
+    """
+    Logger.capture()
+    try:
+        builder.build_block(reader, block, input_path, output_path, converted=converted)
+        return Logger.release(), None
+    except (ConversionError, SystemExit) as e:
+        return Logger.release(), e
+
+
+def _restamp_output_job(builder, reader, output_file, output_path, index=0):
+    """
+    Process pool entry point of Builder.restamp, buffering the Logger messages.
+    :return: (messages, changes, ConversionError | SystemExit | None)
+    """
+    Logger.capture()
+    try:
+        changes = builder.restamp_output(reader, output_file, output_path, index)
+        return Logger.release(), changes, None
+    except (ConversionError, SystemExit) as e:
+        return Logger.release(), [], e
 
 
 def build(**args):
     builder = Builder(**args)
-    builder.build()
\ No newline at end of file
+    builder.build()
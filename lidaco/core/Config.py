@@ -1,7 +1,8 @@
 from ..common.Utils import dict_merge, map_recursively
 from ..common.Logger import Logger
 from yaml import load, FullLoader
-from os import path
+from os import path, stat
+import copy
 
 
 class Config:
@@ -11,6 +12,10 @@ class Config:
 
     """
 
+    # parsed configuration files, by absolute path: (modification time, size, configurations), shared by the
+    # configurations importing the same files, e.g. in a batch of conversions
+    _cache = {}
+
     def __init__(self, context, file_name=None, configs={}):
         """
         Loads a configuration file and the declared imports in it recursively.
@@ -20,6 +25,8 @@ class Config:
         self.configs = {}
         self.config_paths = {}
         self.context = context
+        # loaded configuration files, the imported ones included: {absolute path: (modification time, size)}
+        self.files = {}
 
         tmp_configs = {}
 
@@ -49,19 +56,52 @@ class Config:
             config = Config(import_dir_path, import_filename)
             dict_merge(self.configs, config.get())
             dict_merge(self.config_paths, config.get_path())
+            self.files.update(config.files)
 
     def load_from_file(self, file_name):
         full_path = ""
         try:
             full_path = path.join(self.context, file_name)
             Logger.info('loading_config', full_path.replace("/./", "/"))
-            with open(full_path, 'r') as stream:
-                return load(stream, Loader=FullLoader)
+            configs = copy.deepcopy(Config.load_yaml(full_path))
+            absolute_path = path.abspath(full_path)
+            self.files[absolute_path] = Config._cache[absolute_path][:2]
+            return configs
         except FileNotFoundError as e:
             Logger.error('bad_config_path', full_path.replace("/./", "/"))
         except Exception as e:
             Logger.error('bad_config_formatting', str(e))
 
+    def modified(self):
+        """
+        :return: whether a configuration file, the loaded one or one of its imports, was modified (or removed)
+        since it was loaded.
+        """
+        for file_path, signature in self.files.items():
+            try:
+                status = stat(file_path)
+            except OSError:
+                return True
+            if (status.st_mtime_ns, status.st_size) != signature:
+                return True
+        return False
+
+    @staticmethod
+    def load_yaml(full_path):
+        """
+        Parses a YAML file, once for as long as it is not modified.
+        :param full_path: file path
+        :return: the (cached) parsed configurations, which must not be modified.
+        """
+        absolute_path = path.abspath(full_path)
+        status = stat(absolute_path)
+        cached = Config._cache.get(absolute_path)
+        if cached is None or cached[:2] != (status.st_mtime_ns, status.st_size):
+            with open(absolute_path, 'r') as stream:
+                cached = (status.st_mtime_ns, status.st_size, load(stream, Loader=FullLoader))
+            Config._cache[absolute_path] = cached
+        return cached[2]
+
     def merge(self, config):
         """
         Updates the current configuration data with "config"
@@ -0,0 +1,98 @@
+import traceback
+import copy
+import netCDF4 as nc
+
+from ..common.Logger import Logger
+from ..common.Opener import Opener, MemoryFile
+from .AppendContext import AppendContext
+from .Builder import Builder, ConversionError
+
+
+class Converter:
+    """
+    Library API converting input files held in memory, e.g. received from a message queue, without writing them
+    to (temporary) files. The configurations are resolved and the reader and writer loaded once, when the
+    converter is created, and reused by each conversion:
+
+        converter = Converter({'imports': ['device.yaml', 'metadata.yaml'],
+                               'parameters': {'input': {'format': 'StreamLine'},
+                                              'output': {'format': 'NetCDF4', 'path': 'output'}}},
+                              context='config')
+        output_file = converter.convert(body, 'User5_96_20190308_200500.hpl')
+        dataset = converter.convert(body, 'User5_96_20190308_200500.hpl', in_memory=True)
+    """
+
+    def __init__(self, configs, input_format=None, output_format=None, output_path=None, context=''):
+        """
+        Constructor.
+        :param configs: configurations dictionary or Config instance, as loaded from the config.yaml files;
+        an input path is not required.
+        :param input_format: overrides the input format config, e.g. 'StreamLine'
+        :param output_format: overrides the output format config, e.g. 'NetCDF4'
+        :param output_path: overrides the output path config
+        :param context: path to which the configuration imports and relative paths are resolved
+        """
+        self.builder = Builder(configs=configs, input_format=input_format, output_format=output_format,
+                               context=context)
+        if output_path is not None:
+            self.builder.configs.configs['parameters']['output']['path'] = output_path
+            self.builder.configs.config_paths['parameters']['output']['path'] = context
+
+        self.reader, _, self.output_path = self.builder.prepare()
+        if not self.reader.can_parse():
+            raise ValueError('The {} reader does not support in-memory inputs.'.format(type(self.reader).__name__))
+
+    def convert(self, data, name, in_memory=False):
+        """
+        Converts an input file held in memory, as an output block of its own.
+        :param data: input file contents: bytes, or a file-like object (e.g. a message body stream)
+        :param name: input file name, e.g. User5_96_20190308_200500.hpl (or .hpl.gz for gzip contents), from
+        which the output file is named
+        :param in_memory: if True, the output is not written to the output path but returned as an in-memory
+        netCDF4 dataset
+        :return: output file path (a list of them when several output formats are configured), or open netCDF4
+        Dataset, whose close() returns the netCDF4 file contents.
+        :raises ConversionError: if the input fails to be converted
+        """
+        input_file = MemoryFile(name, data)
+        group = {'id': Opener.name(name), 'files': input_file}
+        writers = self.builder.block_writers(self.reader, [group], self.output_path)
+
+        reader = self.reader
+        if in_memory and reader.metadata_only:
+            # the netCDF4 dataset holds the data, even for a metadata only output format
+            reader = copy.copy(reader)
+            reader.metadata_only = False
+
+        Logger.info('started_r_files', name)
+        try:
+            block = self.builder.parser(reader)(input_file)
+            if in_memory:
+                dataset = nc.Dataset(writers[0].name + '.nc', 'w', format='NETCDF4', memory=0)
+                try:
+                    self.write(dataset, block, writers[0], reader)
+                except Exception:
+                    dataset.close()
+                    raise
+                return dataset
+
+            for writer in writers:
+                with writer.appending(False) as dataset:
+                    self.write(dataset, block, writer)
+            output_files = [writer.file_path() for writer in writers]
+            return output_files[0] if len(output_files) == 1 else output_files
+        except Exception as e:
+            raise ConversionError(name, repr(e), traceback.format_exc()) from e
+
+    def write(self, dataset, block, writer, reader=None):
+        """
+        Writes a parsed block, and the configured attributes and variables, into a new output dataset.
+        :param dataset: cdm/netcdf4 dataset
+        :param block: LidarBlock returned by the reader
+        :param writer: writer of the output block, providing the storage options of the variables
+        :param reader: reader which parsed the block, defaults to the converter one
+        :return: void
+        """
+        self.builder.read_attributes(dataset)
+        self.builder.read_variables(dataset)
+        (reader or self.reader).emit(dataset, block, AppendContext(variable_options=writer.variable_options))
@@ -0,0 +1,128 @@
+from os import path
+from contextlib import closing
+import sqlite3
+import traceback
+
+from ..common.Logger import Logger
+from ..common.Opener import Opener
+
+
+class Index:
+    """
+    Index of the input files of a campaign: a sqlite table with a row per input file holding the values read from
+    its header (see Reader.index_columns), so that input files can be selected by scan type, time window or gate
+    configuration without opening them, e.g. to plan conversions:
+
+        lidaco index --config-file=samples/StreamLine/config.yaml
+        sqlite3 output/index.sqlite "SELECT path FROM inputs WHERE scan_type_id = 1 AND start_time >= '2019-03-08'"
+
+    The input files read are those the configuration selects (input path, include/exclude, since/until). Only the
+    headers are read, and only for the files which are new or whose size or modification time changed since the
+    previous run. The rows of the files outside the selection are kept, so that the table covers the whole
+    campaign as it is indexed in parts, e.g. day by day with --since, and time windows are selected when it is
+    queried; only the rows of the files which no longer exist are removed.
+    The database is written to the parameters/index/path config, by default index.sqlite in the output path.
+    """
+
+    TABLE = 'inputs'
+
+    # columns of every index, followed by the reader ones
+    FILE_COLUMNS = (('path', 'TEXT PRIMARY KEY'), ('size', 'INTEGER'), ('mtime_ns', 'INTEGER'))
+
+    def __init__(self, builder):
+        """
+        Constructor.
+        :param builder: Builder instance, with the configurations of the input files to index
+        """
+        self.builder = builder
+
+    def database_path(self, output_path):
+        """
+        :param output_path: output files directory
+        :return: path of the sqlite database
+        """
+        configs = self.builder.configs
+        if configs.exists('parameters', 'index', 'path'):
+            return configs.get_resolved('parameters', 'index', 'path')
+        return path.join(output_path, 'index.sqlite')
+
+    def run(self):
+        """
+        Indexes the input files, updating the database of a previous run.
+        :return: (database path, rows read, rows unchanged, rows removed)
+        """
+        reader, input_path, output_path = self.builder.prepare()
+        if not reader.index_columns:
+            Logger.error('index_unsupported', type(reader).__name__)
+        if input_path is None:
+            Logger.error('inp_path_missing')
+
+        database_path = self.database_path(output_path)
+        Logger.info('searching_in_path', input_path)
+        with closing(sqlite3.connect(database_path)) as database:
+            with database:
+                Index.create_table(database, reader.index_columns)
+                indexed = {row[0]: tuple(row[1:]) for row in
+                           database.execute('SELECT path, size, mtime_ns FROM {}'.format(Index.TABLE))}
+
+                rows = []
+                scanned = set()
+                failed = set()
+                unchanged = 0
+                for relative_path, entry in reader.scan_input_files(input_path):
+                    scanned.add(relative_path)
+                    status = entry.stat()
+                    signature = (status.st_size, status.st_mtime_ns)
+                    if indexed.get(relative_path) == signature:
+                        unchanged += 1
+                        continue
+                    try:
+                        values = reader.read_index(path.join(input_path, relative_path))
+                    except Exception as e:
+                        Logger.debug(traceback.format_exc())
+                        Logger.warn('index_failed', relative_path, repr(e))
+                        # the row of a previous run is outdated
+                        failed.add(relative_path)
+                        continue
+                    Logger.info('found', relative_path)
+                    rows.append((relative_path,) + signature +
+                                tuple(values[name] for name, _ in reader.index_columns))
+
+                database.executemany('INSERT OR REPLACE INTO {} VALUES ({})'.format(
+                    Index.TABLE, ', '.join('?' * (len(Index.FILE_COLUMNS) + len(reader.index_columns)))), rows)
+                removed = [(relative_path,) for relative_path in indexed if relative_path in failed or (
+                    relative_path not in scanned and not Index.exists(path.join(input_path, relative_path)))]
+                database.executemany('DELETE FROM {} WHERE path = ?'.format(Index.TABLE), removed)
+
+        Logger.log('indexed', database_path, len(rows), unchanged, len(removed))
+        return database_path, len(rows), unchanged, len(removed)
+
+    @staticmethod
+    def exists(file_path):
+        """
+        :param file_path: input file path, or path of an archive member
+        :return: whether the file (or its archive) exists
+        """
+        try:
+            Opener.stat(file_path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def create_table(database, columns):
+        """
+        Creates the index table, and an index per reader column. A table of other columns, e.g. written by another
+        reader, is replaced.
+        :param database: sqlite3 connection
+        :param columns: reader columns, (name, sqlite type) pairs
+        :return: void
+        """
+        columns = Index.FILE_COLUMNS + tuple(columns)
+        existing = [row[1] for row in database.execute('PRAGMA table_info({})'.format(Index.TABLE))]
+        if existing and existing != [name for name, _ in columns]:
+            database.execute('DROP TABLE {}'.format(Index.TABLE))
+        database.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(
+            Index.TABLE, ', '.join('{} {}'.format(name, datatype) for name, datatype in columns)))
+        for name, _ in columns[len(Index.FILE_COLUMNS):]:
+            database.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})'.format(Index.TABLE, name))
@@ -0,0 +1,285 @@
+import numpy as np
+
+from .MetadataDataset import MetadataDataset
+
+
+class LidarVariable:
+    """
+    In-memory variable of a LidarBlock: data type, dimensions, data array and attributes.
+    Mimics the netCDF4 variable API used by the readers, i.e. attributes are set as python
+    attributes and data is assigned using slices.
+    """
+
+    def __init__(self, name, datatype, dimensions=(), shape=None):
+        """
+        Constructor.
+        :param name: variable name
+        :param datatype: netcdf4 data type, e.g. 'f4', 'i', str
+        :param dimensions: dimension names tuple (or a single name)
+        :param shape: variable shape, used to allocate it when only parts of it are assigned
+        """
+        if isinstance(dimensions, str):
+            dimensions = (dimensions,)
+        self.__dict__.update({
+            'name': name,
+            'datatype': datatype,
+            'dimensions': tuple(dimensions),
+            'shape': shape,
+            'data': None,
+            'attributes': {},
+        })
+
+    def __setattr__(self, key, value):
+        if key in self.__dict__:
+            self.__dict__[key] = value
+        else:
+            self.attributes[key] = value
+
+    def __getattr__(self, key):
+        attributes = self.__dict__.get('attributes')
+        if key.startswith('__') or attributes is None or key not in attributes:
+            raise AttributeError(key)
+        return attributes[key]
+
+    def __setitem__(self, key, value):
+        """
+        Assigns data. Assigning the whole variable, e.g. var[:] = values, keeps the values as given;
+        partial assignments fill a masked array allocated with the variable shape.
+        """
+        if LidarVariable.is_whole(key):
+            self.data = np.asarray(value)
+        else:
+            if self.data is None:
+                dtype = object if self.datatype is str else self.datatype
+                self.data = np.ma.masked_all(self.shape, dtype=dtype)
+            self.data[key] = value
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __len__(self):
+        return len(self.data)
+
+    def ncattrs(self):
+        return list(self.attributes.keys())
+
+    def getncattr(self, name):
+        return self.attributes[name]
+
+    def copy(self):
+        """
+        Shallow copy, the data array is shared.
+        :return: LidarVariable
+        """
+        variable = LidarVariable(self.name, self.datatype, self.dimensions, self.shape)
+        variable.data = self.data
+        variable.attributes.update(self.attributes)
+        return variable
+
+    @staticmethod
+    def is_whole(key):
+        keys = key if isinstance(key, tuple) else (key,)
+        return all(k is Ellipsis or k == slice(None) for k in keys)
+
+
+class LidarBlock:
+    """
+    Columnar, in-memory representation of the data parsed from an input file/group.
+    Holds the dimensions, variables (coordinate and data arrays with their attributes),
+    global attributes and groups to be written to an output dataset.
+
+    It mimics the netCDF4 Dataset API used by the readers (createDimension, createVariable,
+    createGroup, variables, global attributes as python attributes), does not require an open
+    output file and can be pickled, e.g. to be sent between processes.
+    """
+
+    def __init__(self, parent=None):
+        """
+        Constructor.
+        :param parent: parent block of a group, whose dimensions are visible to the group (as in netcdf4).
+        """
+        self.__dict__.update({
+            'parent': parent,
+            'dimensions': {},
+            'variables': {},
+            'groups': {},
+            'attributes': {},
+            'info': {},
+        })
+
+    def __setattr__(self, key, value):
+        if key in self.__dict__:
+            self.__dict__[key] = value
+        else:
+            self.attributes[key] = value
+
+    def __getattr__(self, key):
+        attributes = self.__dict__.get('attributes')
+        if key.startswith('__') or attributes is None or key not in attributes:
+            raise AttributeError(key)
+        return attributes[key]
+
+    def __getitem__(self, name):
+        return self.variables[name]
+
+    def createDimension(self, name, size=None):
+        """
+        Creates a dimension.
+        :param name: dimension name
+        :param size: dimension size, None for an unlimited dimension (along which blocks are appended)
+        :return: void
+        """
+        self.dimensions[name] = size
+
+    def createVariable(self, name, datatype, dimensions=()):
+        """
+        Creates a variable.
+        :param name: variable name
+        :param datatype: netcdf4 data type
+        :param dimensions: dimension names tuple (or a single name)
+        :return: LidarVariable
+        """
+        if isinstance(dimensions, str):
+            dimensions = (dimensions,)
+        shape = tuple(self.dimension_size(d) for d in dimensions)
+        variable = LidarVariable(name, datatype, dimensions, shape)
+        self.variables[name] = variable
+        return variable
+
+    def createGroup(self, name):
+        """
+        Creates a group, itself a LidarBlock.
+        :param name: group name
+        :return: LidarBlock
+        """
+        group = LidarBlock(self)
+        self.groups[name] = group
+        return group
+
+    def dimension_size(self, name):
+        """
+        :param name: dimension name, looked up in this block and then in its parents.
+        :return: the dimension size, None if unlimited.
+        """
+        block = self
+        while name not in block.dimensions:
+            if block.parent is None:
+                raise KeyError(name)
+            block = block.parent
+        return block.dimensions[name]
+
+    def ncattrs(self):
+        return list(self.attributes.keys())
+
+    def getncattr(self, name):
+        return self.attributes[name]
+
+    def unlimited_dimension(self):
+        """
+        :return: the name of the (first) unlimited dimension, None if there is none.
+        """
+        return next((name for name, size in self.dimensions.items() if size is None), None)
+
+    def n_rows(self):
+        """
+        :return: number of rows along the unlimited dimension, i.e. appended to an output dataset; 0 if there is
+        no unlimited dimension.
+        """
+        dimension = self.unlimited_dimension()
+        return max((len(var.data) for var in self.variables.values()
+                    if var.data is not None and var.dimensions[:1] == (dimension,)), default=0)
+
+    def copy(self, parent=None):
+        """
+        Shallow copy, data arrays are shared. Used by readers that adjust a block before writing it,
+        without modifying the parsed one.
+        :param parent: parent of the copy, for groups.
+        :return: LidarBlock
+        """
+        block = LidarBlock(parent)
+        block.dimensions.update(self.dimensions)
+        block.variables.update({name: var.copy() for name, var in self.variables.items()})
+        block.groups.update({name: group.copy(block) for name, group in self.groups.items()})
+        block.attributes.update(self.attributes)
+        block.info.update(self.info)
+        return block
+
+    def chunking(self, variable_options, rows):
+        """
+        Chunk sizes of the variables along the unlimited dimension when the whole input, of which the block is the
+        first chunk, is written at once. The netCDF library picks the default chunk sizes from the dimension
+        length when each variable is created, so the writes of the whole input are replayed into a
+        MetadataDataset, which mirrors them.
+        :param variable_options: as in write_to
+        :param rows: rows of the whole input along the unlimited dimension
+        :return: {variable name: chunk sizes}
+        """
+        dimension = self.unlimited_dimension()
+        chunking = {}
+        with MetadataDataset() as scratch:
+            for name, dimension_size in self.dimensions.items():
+                scratch.createDimension(name, dimension_size)
+            for name, var in self.variables.items():
+                along = var.dimensions[:1] == (dimension,)
+                var_rows = rows if along else len(var.data) if var.data is not None and var.data.ndim else None
+                options = variable_options(name, var.datatype, var.dimensions, var.shape, var_rows) \
+                    if variable_options else {}
+                scratch_var = scratch.createVariable(name, var.datatype, var.dimensions, **options)
+                if var.data is not None and along:
+                    scratch_var[:rows] = var.data
+                if along and var.datatype is not str and scratch_var.chunking() != 'contiguous':
+                    chunking[name] = tuple(scratch_var.chunking())
+        return chunking
+
+    def write_to(self, dataset, appending=False, variable_options=None, size=None, offset=None, rows=None):
+        """
+        Writes the block into a dataset.
+        :param dataset: cdm/netcdf4 dataset.
+        :param appending: if False, the dimensions, variables and attributes are created.
+        Otherwise, the variables along the unlimited dimension are appended to the existing ones.
+        :param variable_options: optional function (name, datatype, dimensions, shape, rows) returning the storage
+        keyword arguments (chunking, compression) of the created variables, e.g. Writer.variable_options.
+        :param size: planned size of the unlimited dimension, which is then created with this fixed size.
+        :param offset: row of the unlimited dimension the block is appended at, defaults to the dimension length.
+        :param rows: rows of the whole input along the unlimited dimension, when the block is the first chunk of it:
+        the variables are then created with the storage options (chunk sizes) of the whole input, see chunking.
+        :return: void
+        """
+        dimension = self.unlimited_dimension()
+        if not appending:
+            for key, value in self.attributes.items():
+                setattr(dataset, key, value)
+
+            chunking = self.chunking(variable_options, rows) if rows and not size else {}
+
+            for name, dimension_size in self.dimensions.items():
+                dataset.createDimension(name, size if name == dimension and size else dimension_size)
+
+            for name, var in self.variables.items():
+                along = size and var.dimensions[:1] == (dimension,)
+                var_rows = size if along else len(var.data) if var.data is not None and var.data.ndim else None
+                if name in chunking:
+                    var_rows = rows
+                options = variable_options(name, var.datatype, var.dimensions, var.shape, var_rows) \
+                    if variable_options else {}
+                if name in chunking:
+                    options = dict(options, chunksizes=chunking[name])
+                nc_var = dataset.createVariable(name, var.datatype, var.dimensions, **options)
+                for key, value in var.attributes.items():
+                    setattr(nc_var, key, value)
+                if var.data is not None:
+                    if along:
+                        nc_var[:len(var.data)] = var.data
+                    else:
+                        nc_var[:] = var.data
+
+            for name, group in self.groups.items():
+                group.write_to(dataset.createGroup(name), variable_options=variable_options)
+        else:
+            if dimension is None:
+                raise ValueError('Appending requires an unlimited dimension.')
+
+            n_times = len(dataset.dimensions[dimension]) if offset is None else offset
+            for name, var in self.variables.items():
+                if var.data is not None and var.dimensions[:1] == (dimension,):
+                    dataset.variables[name][n_times:n_times + len(var.data)] = var.data
@@ -0,0 +1,138 @@
+from os import path, replace
+from datetime import datetime, timezone
+import hashlib
+import json
+
+from ..common.Opener import Opener
+
+
+class Manifest:
+    """
+    Record of the output blocks converted into an output directory, stored as a JSON file next to the outputs:
+    for each output file, the size and modification time of its input files and a digest of the configurations
+    it was converted with. It lets a resumed conversion skip the output blocks that are up to date, append new
+    input files to the output block they belong to, e.g. when files are added to a campaign directory, and
+    rebuild only the blocks whose inputs or configurations changed. Several configurations, e.g. the instruments
+    of a campaign, may share an output directory.
+    """
+
+    FILENAME = '.lidaco_manifest.json'
+
+    def __init__(self, dir_path, config_digest, data_digest=None):
+        """
+        Constructor. Loads the manifest of the directory, if any.
+        :param dir_path: output directory
+        :param config_digest: digest of the configurations, see Manifest.digest
+        :param data_digest: digest of the configurations but the metadata, see Manifest.data_digest
+        """
+        self.file_path = path.join(dir_path, Manifest.FILENAME)
+        self.config_digest = config_digest
+        self.data_digest = data_digest
+        self.outputs = self.load()
+
+    def load(self):
+        """
+        :return: {output file name: record} of the manifest file, {} if there is none.
+        """
+        try:
+            with open(self.file_path) as f:
+                return json.load(f).get('outputs', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    @staticmethod
+    def digest(configs):
+        """
+        :param configs: configurations dictionary
+        :return: sha256 hex digest of the configurations
+        """
+        text = json.dumps(configs, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @staticmethod
+    def data_digest(configs):
+        """
+        :param configs: configurations dictionary
+        :return: sha256 hex digest of the configurations but the attributes and variables ones, which can be
+        applied to converted outputs (see Builder.restamp).
+        """
+        return Manifest.digest({key: value for key, value in configs.items() if key not in ('attributes', 'variables')})
+
+    @staticmethod
+    def inputs(paths):
+        """
+        :param paths: input files/groups paths of an output block (a tuple of paths for each group)
+        :return: for each input file/group, [[path, size, modification time (ns)]] of its files
+        """
+        inputs = []
+        for item in paths:
+            files = []
+            for f in (item if isinstance(item, tuple) else (item,)):
+                status = Opener.stat(f)
+                files.append([f, status.st_size, status.st_mtime_ns])
+            inputs.append(files)
+        return inputs
+
+    def converted(self, output_path, inputs):
+        """
+        :param output_path: output file path
+        :param inputs: the block inputs, as returned by Manifest.inputs
+        :return: number of leading inputs of the block already converted, unchanged, into the existing output
+        file: all of them when it is up to date, 0 when the block has to be rebuilt (or its configurations
+        changed).
+        """
+        record = self.outputs.get(path.basename(output_path))
+        if record is None or record.get('config_digest') != self.config_digest or not path.exists(output_path):
+            return 0
+        done = record['inputs']
+        return len(done) if inputs[:len(done)] == done else 0
+
+    def is_current(self, output_path, inputs):
+        """
+        :param output_path: output file path
+        :param inputs: the block inputs, as returned by Manifest.inputs
+        :return: whether the output file exists and was converted from the same inputs.
+        """
+        return self.converted(output_path, inputs) == len(inputs)
+
+    def record(self, output_path, inputs):
+        """
+        Records a converted output block and saves the manifest, so that an interrupted conversion
+        keeps the blocks converted so far. The records written meanwhile to the manifest file, e.g. by the
+        conversion of another configuration sharing the output directory, are kept.
+        :param output_path: output file path
+        :param inputs: the block inputs, as returned by Manifest.inputs
+        :return: void
+        """
+        self.outputs = self.load()
+        self.outputs[path.basename(output_path)] = {
+            'inputs': inputs,
+            'config_digest': self.config_digest,
+            'data_digest': self.data_digest,
+            'converted': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+        self.save()
+
+    def restamped(self, output_path):
+        """
+        Updates the configurations digest of an output file whose metadata was restamped, so that it is still
+        up to date for a resumed conversion.
+        :param output_path: output file path
+        :return: False if the output file was converted with other (data) configurations, and then needs to be
+        converted again; True otherwise.
+        """
+        self.outputs = self.load()
+        record = self.outputs.get(path.basename(output_path))
+        if record is None:
+            return True
+        if record.get('data_digest') != self.data_digest:
+            return False
+        record['config_digest'] = self.config_digest
+        self.save()
+        return True
+
+    def save(self):
+        temp_path = self.file_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'outputs': self.outputs}, f, indent=1)
+        replace(temp_path, self.file_path)
@@ -0,0 +1,245 @@
+import numpy as np
+import netCDF4 as nc
+
+
+class MetadataDimension:
+    """
+    Dimension of a MetadataDataset. Mimics the netCDF4 dimension API (size, len, isunlimited).
+    """
+
+    def __init__(self, name, size=None, marker=None):
+        """
+        Constructor.
+        :param name: dimension name
+        :param size: dimension size, None for an unlimited dimension
+        :param marker: scratch variable along an unlimited dimension, written at its last row as it is extended
+        """
+        self.name = name
+        self.unlimited = size is None
+        self.size = 0 if size is None else int(size)
+        self.marker = marker
+
+    def extend(self, size):
+        """
+        Extends an unlimited dimension to the rows written along it.
+        :param size: number of rows
+        :return: void
+        """
+        self.size = max(self.size, size)
+        if self.size:
+            self.marker[self.size - 1] = 0
+
+    def __len__(self):
+        return self.size
+
+    def isunlimited(self):
+        return self.unlimited
+
+
+class MetadataVariable:
+    """
+    Variable of a MetadataDataset: data type, dimensions, storage options and attributes. Mimics the netCDF4
+    variable API; assigned data is discarded, but for the length it gives to an unlimited dimension.
+    """
+
+    def __init__(self, dataset, name, datatype, dimensions=(), options=None):
+        """
+        Constructor.
+        :param dataset: MetadataDataset (or group) of the variable
+        :param name: variable name
+        :param datatype: netcdf4 data type, e.g. 'f4', 'i', str
+        :param dimensions: dimension names tuple (or a single name)
+        :param options: createVariable storage keyword arguments (chunksizes, contiguous, compression...)
+        """
+        if isinstance(dimensions, str):
+            dimensions = (dimensions,)
+        dimensions = tuple(dimensions)
+        self.__dict__.update({
+            'dataset': dataset,
+            'name': name,
+            'datatype': datatype,
+            'dimensions': dimensions,
+            'attributes': {},
+            # variable of the same type, dimensions and storage options in the scratch dataset, without data
+            'twin': dataset.scratch.createVariable(name, datatype, dimensions, **(options or {})),
+        })
+
+    def __setattr__(self, key, value):
+        if key in self.__dict__:
+            self.__dict__[key] = value
+        else:
+            self.attributes[key] = value
+
+    def __getattr__(self, key):
+        attributes = self.__dict__.get('attributes')
+        if key.startswith('__') or attributes is None or key not in attributes:
+            raise AttributeError(key)
+        return attributes[key]
+
+    @property
+    def dtype(self):
+        return self.twin.dtype
+
+    @property
+    def shape(self):
+        return tuple(len(self.dataset.dimension(name)) for name in self.dimensions)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __setitem__(self, key, value):
+        """
+        Discards the assigned data, extending the unlimited dimension the variable is along (if any) to the
+        rows assigned.
+        """
+        dimension = self.dataset.dimension(self.dimensions[0]) if self.dimensions else None
+        if dimension is not None and dimension.isunlimited():
+            key = key[0] if isinstance(key, tuple) else key
+            if key is Ellipsis:
+                key = slice(None)
+            if isinstance(key, slice):
+                start = key.start or 0
+                stop = key.stop if key.stop is not None else start + (len(value) if np.ndim(value) else 1)
+            else:
+                stop = int(np.max(key)) + 1 if np.size(key) else 0
+            dimension.extend(stop)
+
+    def __getitem__(self, key):
+        # the data is not kept, reads return masked (missing) values
+        dtype = object if self.datatype is str else self.dtype
+        return np.ma.masked_all(self.shape, dtype=dtype)[key]
+
+    def ncattrs(self):
+        return list(self.attributes.keys())
+
+    def getncattr(self, name):
+        return self.attributes[name]
+
+    def setncattr(self, name, value):
+        self.attributes[name] = value
+
+    def chunking(self):
+        """
+        :return: 'contiguous' or the chunk sizes list, as the netCDF4 variable (the library picking the default
+        chunk sizes from the dimension sizes when the variable was created).
+        """
+        return self.twin.chunking()
+
+
+class MetadataDataset:
+    """
+    Metadata-only output dataset, used by the writers that record the structure of the output but not its data
+    (NcML, MetadataCard) instead of an in-memory netCDF4 dataset. It records the dimensions, attributes, data
+    types and chunking of the variables written by the readers, and discards the data arrays.
+
+    It mimics the netCDF4 Dataset API used by the readers and the Builder (createDimension, createVariable,
+    createGroup, dimensions, variables, global attributes as python attributes). Data types and chunking are
+    those of the netCDF library: the structure is mirrored into an in-memory scratch dataset, where writing
+    a single value per assignment along an unlimited dimension extends it as the data would.
+    """
+
+    def __init__(self, file_path='', parent=None, scratch=None):
+        """
+        Constructor.
+        :param file_path: path of the output file, returned by filepath()
+        :param parent: parent dataset of a group, whose dimensions are visible to the group (as in netcdf4).
+        :param scratch: scratch netCDF4 group of a group
+        """
+        if scratch is None:
+            # in-memory files are still named, uniquely among the open ones
+            scratch = nc.Dataset('metadata_{}.nc'.format(id(self)), 'w', diskless=True, persist=False)
+        self.__dict__.update({
+            'file_path': file_path,
+            'parent': parent,
+            'scratch': scratch,
+            'dimensions': {},
+            'variables': {},
+            'groups': {},
+            'attributes': {},
+        })
+
+    def __setattr__(self, key, value):
+        if key in self.__dict__:
+            self.__dict__[key] = value
+        else:
+            self.attributes[key] = value
+
+    def __getattr__(self, key):
+        attributes = self.__dict__.get('attributes')
+        if key.startswith('__') or attributes is None or key not in attributes:
+            raise AttributeError(key)
+        return attributes[key]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def filepath(self):
+        return self.file_path
+
+    def ncattrs(self):
+        return list(self.attributes.keys())
+
+    def getncattr(self, name):
+        return self.attributes[name]
+
+    def setncattr(self, name, value):
+        self.attributes[name] = value
+
+    def createDimension(self, name, size=None):
+        """
+        Creates a dimension.
+        :param name: dimension name
+        :param size: dimension size, None for an unlimited dimension
+        :return: MetadataDimension
+        """
+        self.scratch.createDimension(name, size)
+        marker = None if size is not None else self.scratch.createVariable('_rows_{}'.format(name), 'u1', (name,))
+        dimension = MetadataDimension(name, size, marker)
+        self.dimensions[name] = dimension
+        return dimension
+
+    def createVariable(self, name, datatype, dimensions=(), **options):
+        """
+        Creates a variable.
+        :param name: variable name
+        :param datatype: netcdf4 data type
+        :param dimensions: dimension names tuple (or a single name)
+        :param options: netCDF4 createVariable storage keyword arguments
+        :return: MetadataVariable
+        """
+        variable = MetadataVariable(self, name, datatype, dimensions, options)
+        self.variables[name] = variable
+        return variable
+
+    def createGroup(self, name):
+        """
+        Creates a group, itself a MetadataDataset.
+        :param name: group name
+        :return: MetadataDataset
+        """
+        group = MetadataDataset(self.file_path, self, self.scratch.createGroup(name))
+        self.groups[name] = group
+        return group
+
+    def dimension(self, name):
+        """
+        :param name: dimension name, looked up in this dataset and then in its parents.
+        :return: MetadataDimension
+        """
+        dataset = self
+        while name not in dataset.dimensions:
+            if dataset.parent is None:
+                raise KeyError(name)
+            dataset = dataset.parent
+        return dataset.dimensions[name]
+
+    def close(self):
+        """
+        Releases the scratch dataset. The recorded metadata is kept, but for the chunking.
+        :return: void
+        """
+        if self.parent is None and self.scratch.isopen():
+            self.scratch.close()
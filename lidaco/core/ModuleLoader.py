@@ -10,6 +10,7 @@ class ModuleLoader:
         super().__init__()
         self.reader_module = None
         self.writer_module = None
+        self.writer_modules = []
 
     @staticmethod
     def load(path, name):
@@ -33,11 +34,11 @@ class ModuleLoader:
 
     def load_writer(self, name):
         """
-        Loads a writer and stores it into writer_modules dictionary.
+        Loads a writer and adds it to the writer_modules list.
         :param name: writer name
         :return: void
         """
-        self.writer_module = self.load('..writers.', name)
+        self.add_writer(self.load('..writers.', name))
 
     def get_reader(self):
         """
@@ -48,14 +49,27 @@ class ModuleLoader:
 
     def get_writer(self):
         """
-        Returns the writer class.
+        Returns the (first) writer class.
         :return: class reference
         """
         return self.writer_module
 
+    def get_writers(self):
+        """
+        Returns the writer classes, one per output format.
+        :return: list of class references
+        """
+        return self.writer_modules
+
 
     def set_reader(self, reader):
         self.reader_module = reader
 
     def set_writer(self, writer):
         self.writer_module = writer
+        self.writer_modules = [writer]
+
+    def add_writer(self, writer):
+        if self.writer_module is None:
+            self.writer_module = writer
+        self.writer_modules.append(writer)
@@ -0,0 +1,218 @@
+from os import path, scandir, replace, utime, getpid
+import pathlib
+import sys
+import hashlib
+import inspect
+import pickle
+import shutil
+import json
+import numpy as np
+
+from ..common.Opener import Opener
+
+
+class ParseCache:
+    """
+    On-disk cache of the blocks parsed from the input files, so that a conversion re-run after editing the
+    attributes or variables configurations (e.g. metainfo.yaml) writes the cached data instead of parsing the
+    input files again. It is enabled by the parse_cache configuration:
+
+        parameters:
+          parse_cache:
+            path: .lidaco_cache
+            max_size: 2048      # MiB, the least recently used entries are evicted above it after each conversion
+
+    Entries are keyed by the contents of the input file(s), the reader (class, and source code of its module and
+    of the package modules it uses, e.g. Reader, LidarBlock, Timestamps) and the configurations the reader depends on, i.e. all but the attributes, the variables and the paths and
+    selections of files. Each entry is a directory with the numeric arrays of the block as .npy files, which are
+    memory-mapped when the entry is read, and the rest of the block pickled.
+    """
+
+    # configurations that do not change the parsed blocks
+    UNKEYED = {
+        'attributes': None,
+        'variables': None,
+        'parameters': {
+            'parse_cache': None,
+            'index': None,
+            'input': {'path': None, 'recursive': None, 'include': None, 'exclude': None, 'since': None,
+                      'until': None, 'archives': None, 'memory_budget': None,
+                      'max_rows': None},
+            'output': {'path': None, 'format': None, 'compression': None, 'presize_dimensions': None},
+            'output_block_size': None,
+        },
+    }
+
+    BLOCK_FILE = 'block.pkl'
+
+    def __init__(self, reader, configs):
+        """
+        Constructor.
+        :param reader: reader instance, with its configurations set
+        :param configs: Config instance, with a parameters/parse_cache/path configuration
+        """
+        self.reader = reader
+        self.dir_path = configs.get_resolved('parameters', 'parse_cache', 'path')
+        max_size = configs.get('parameters', 'parse_cache').get('max_size')
+        self.max_bytes = None if max_size is None else float(max_size) * 2 ** 20
+
+        version = hashlib.sha256('{}/{}'.format(type(reader).__qualname__, reader.metadata_only).encode())
+        for source in ParseCache.sources(sys.modules[type(reader).__module__]):
+            with open(source, 'rb') as f:
+                version.update(f.read())
+        version.update(json.dumps(ParseCache.keyed(configs.configs, ParseCache.UNKEYED), sort_keys=True,
+                                  default=str).encode())
+        self.version = version.hexdigest()
+
+    @staticmethod
+    def sources(module):
+        """
+        :param module: module, e.g. of a reader
+        :return: sorted source files of the module and of the modules of its package it depends on, i.e. whose
+        classes, functions or modules it imports, recursively.
+        """
+        package = module.__name__.split('.')[0]
+        sources = {}
+        pending = [module]
+        while pending:
+            module = pending.pop()
+            if module.__name__ in sources:
+                continue
+            sources[module.__name__] = inspect.getsourcefile(module)
+            for value in vars(module).values():
+                name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+                if isinstance(name, str) and name.split('.')[0] == package and name in sys.modules:
+                    pending.append(sys.modules[name])
+        return sorted(source for source in sources.values() if source)
+
+    @staticmethod
+    def enabled(configs):
+        """
+        :param configs: Config instance
+        :return: whether the parse_cache configuration is set.
+        """
+        return configs.exists('parameters', 'parse_cache', 'path')
+
+    @staticmethod
+    def keyed(configs, unkeyed):
+        """
+        :param configs: configurations dictionary
+        :param unkeyed: configurations to leave out, as a dictionary of the same structure with None leaves
+        :return: the configurations without the unkeyed ones
+        """
+        return {key: ParseCache.keyed(value, unkeyed[key]) if isinstance(value, dict) and unkeyed.get(key) else value
+                for key, value in configs.items() if key not in unkeyed or unkeyed[key] is not None}
+
+    def key(self, input):
+        """
+        :param input: input file path, or tuple of paths of a group
+        :return: cache key of the input
+        """
+        digest = hashlib.sha256(self.version.encode())
+        for file_path in (input if isinstance(input, tuple) else (input,)):
+            with Opener.open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(2 ** 20), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def parse(self, input):
+        """
+        Parses an input file/group, or reads its block from the cache. Used in place of Reader.parse.
+        :param input: input file path, or tuple of paths of a group
+        :return: LidarBlock
+        """
+        key = self.key(input)
+        entry = path.join(self.dir_path, key)
+        if path.isfile(path.join(entry, ParseCache.BLOCK_FILE)):
+            try:
+                block = ParseCache.load(entry)
+                # the entry modification time orders the entries for eviction
+                utime(entry)
+                return block
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                shutil.rmtree(entry, ignore_errors=True)
+
+        block = self.reader.parse(input)
+        if block is not None:
+            self.store(entry, block)
+        return block
+
+    @staticmethod
+    def groups(block, names=()):
+        """
+        :return: generator of (group path, block) of a block and its groups
+        """
+        yield names, block
+        for name, group in block.groups.items():
+            yield from ParseCache.groups(group, names + (name,))
+
+    @staticmethod
+    def store(entry, block):
+        """
+        Writes a block into a cache entry directory (written aside and then renamed, as other processes may
+        read or write the same entry).
+        :param entry: entry directory path
+        :param block: LidarBlock
+        :return: void
+        """
+        temp_path = '{}.{}.tmp'.format(entry, getpid())
+        shutil.rmtree(temp_path, ignore_errors=True)
+        pathlib.Path(temp_path).mkdir(parents=True)
+
+        stored = block.copy()
+        arrays = {}
+        for names, group in ParseCache.groups(stored):
+            for name, var in group.variables.items():
+                if type(var.data) is np.ndarray and var.data.dtype.kind in 'biufcmM' and var.data.ndim:
+                    file_name = '{}.npy'.format(len(arrays))
+                    np.save(path.join(temp_path, file_name), var.data)
+                    arrays[file_name] = (names, name)
+                    var.data = None
+        with open(path.join(temp_path, ParseCache.BLOCK_FILE), 'wb') as f:
+            pickle.dump({'block': stored, 'arrays': arrays}, f, pickle.HIGHEST_PROTOCOL)
+
+        try:
+            replace(temp_path, entry)
+        except OSError:
+            # stored meanwhile by another process
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    @staticmethod
+    def load(entry):
+        """
+        :param entry: entry directory path
+        :return: the LidarBlock of a cache entry, its numeric arrays being memory-mapped (read only).
+        """
+        with open(path.join(entry, ParseCache.BLOCK_FILE), 'rb') as f:
+            stored = pickle.load(f)
+        block = stored['block']
+        for file_name, (names, name) in stored['arrays'].items():
+            group = block
+            for group_name in names:
+                group = group.groups[group_name]
+            group.variables[name].data = np.load(path.join(entry, file_name), mmap_mode='r')
+        return block
+
+    def evict(self):
+        """
+        Removes the least recently used entries while the cache is larger than its maximum size. The cache is
+        scanned, so it is run once per conversion (see Builder.convert) rather than for each stored entry.
+        :return: void
+        """
+        if self.max_bytes is None:
+            return
+        entries = []
+        with scandir(self.dir_path) as items:
+            for item in items:
+                if item.is_dir() and not item.name.endswith('.tmp'):
+                    with scandir(item.path) as files:
+                        size = sum(f.stat().st_size for f in files if f.is_file())
+                    entries.append((item.stat().st_mtime_ns, size, item.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
-from os import listdir
+from os import scandir, path
 from itertools import groupby
+from fnmatch import fnmatch
+import re
+import numpy as np
 from lidaco.common.Logger import Logger
+from lidaco.common.Opener import Opener
+from lidaco.common.Timestamps import Timestamps
+from lidaco.core.AppendContext import AppendContext
 
 
 class Reader(ABC):
@@ -11,6 +17,21 @@ class Reader(ABC):
 
     out_path = ''
 
+    # global attributes set from the input files, which override the configured ones (see Builder.restamp)
+    data_attributes = ()
+
+    # columns of the input files index (see Index), as (name, sqlite type) pairs, set by the readers implementing
+    # read_index
+    index_columns = ()
+
+    # set when the output records the metadata only (see Writer.metadata_only): parse may then skip the data
+    # columns, giving their variables placeholder arrays of the right shape
+    metadata_only = False
+
+    # date and (optional) time in file names, e.g. 20161211135000_wind.txt, User5_96_20190308_200500.hpl,
+    # WLS7-164_2016_11_24__00_00_00.sta, TritonExport_2017-03-13-04-46-38_innogySE_s.csv
+    FILE_TIME = re.compile(r'(?<!\d)(\d{4})[-_]*(\d{2})[-_]*(\d{2})(?:[-_T]*(\d{2})[-_]*(\d{2})[-_]*(\d{2}))?')
+
     def __init__(self, data_grouping):
         """
         Constructor.
@@ -22,30 +43,179 @@ class Reader(ABC):
 
     def fetch_input_files(self, dir_path):
         """
-        Lists and filters input data files. If the reader specifies a group_by function,
-        it also groups files by that value, return a dictionary group => [files].
+        Lists and filters input data files (see scan_input_files). If the reader specifies a group_by function,
+        it also groups files by that value.
         :param dir_path: directory containing input data files
-        :return: [files] | {group => [files]}
+        :return: [{'id': file, 'files': file}] | [{'id': group, 'files': [files]}]
         """
         Logger.info('searching_in_path', dir_path)
-        files = [f for f in listdir(dir_path) if self.accepts_file(f)]
-        [Logger.info('found', f) for f in files]
+        files = []
+        for relative_path, _ in self.scan_input_files(dir_path):
+            Logger.info('found', relative_path)
+            files.append(relative_path)
 
         if len(files) == 0:
             Logger.error('files_not_found')
 
+        return self.group_input_files(files)
+
+    def scan_input_files(self, dir_path):
+        """
+        Walks the input directory with os.scandir, recursively when input/recursive is set, yielding the files
+        accepted by the reader that match the input/include globs (if any), none of the input/exclude globs,
+        and whose name time (see file_time) is within input/since and input/until. Globs are matched against
+        the path relative to the input directory. Subdirectories of a year/month/day tree outside the time
+        window are not listed.
+        Compressed files (.gz, .bz2, .xz) are accepted by their name without the compression extension, and
+        the members of .zip/.tar archives are listed as files of a directory, unless input/archives is false;
+        both are read through Opener.
+        :param dir_path: directory containing input data files
+        :return: generator of (path relative to dir_path, os.DirEntry of the file or of its archive)
+        """
+        recursive = self.input_option('recursive', False)
+        archives = self.input_option('archives', True)
+        include = self.input_option('include', None)
+        exclude = self.input_option('exclude', None) or []
+        include = [include] if isinstance(include, str) else include
+        exclude = [exclude] if isinstance(exclude, str) else exclude
+        since, until = self.time_window()
+
+        def accepted(relative_path):
+            name = Opener.name(relative_path)
+            return (self.accepts_file(name) and
+                    not any(fnmatch(relative_path, pattern) for pattern in exclude) and
+                    (include is None or any(fnmatch(relative_path, pattern) for pattern in include)) and
+                    Reader.within(self.file_time(name), since, until))
+
+        directories = ['']
+        while directories:
+            directory = directories.pop()
+            subdirectories = []
+            with scandir(path.join(dir_path, directory)) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    relative_path = path.join(directory, entry.name)
+                    if entry.is_dir():
+                        if (recursive and not any(fnmatch(relative_path, pattern) for pattern in exclude) and
+                                Reader.overlaps(Reader.directory_period(relative_path), since, until)):
+                            subdirectories.append(relative_path)
+                    elif not entry.is_file():
+                        continue
+                    elif accepted(relative_path):
+                        yield relative_path, entry
+                    elif archives and Opener.is_archive(entry.name) and \
+                            not any(fnmatch(relative_path, pattern) for pattern in exclude):
+                        for member in sorted(Opener.members(entry.path)):
+                            if accepted(path.join(relative_path, member)):
+                                yield path.join(relative_path, member), entry
+            # depth first, in name order
+            directories.extend(reversed(subdirectories))
+
+    def group_input_files(self, files):
+        """
+        Groups input files by group_id, when the reader groups its data, and sorts them.
+        :param files: accepted input file paths, relative to the input directory
+        :return: [{'id': file name (without compression extension), 'files': file}] |
+        [{'id': group, 'files': [files]}]
+        """
         if self.data_grouping:
             Logger.info('grouping')
-            files.sort()
-            input_files = []
+            keyed = sorted((self.group_id(Opener.name(f)), f) for f in files)
+            return [{'id': k, 'files': [f for _, f in g]} for k, g in groupby(keyed, key=lambda item: item[0])]
 
-            for k, g in groupby(files, self.group_id):
-                input_files.append({'id': k, 'files': list(g)})
-        else:
-            input_files = [{'id': f, 'files': f} for f in files]
+        return sorted(({'id': Opener.name(f), 'files': f} for f in files), key=lambda group: (group['id'], group['files']))
+
+    def file_time(self, filename):
+        """
+        Time of an input file derived from its name, used to select files by time window (input/since,
+        input/until) without opening them. It may be overridden by readers with other file name patterns.
+        :param filename: e.g., 20161211135000_wind.txt
+        :return: numpy datetime64[s], None if the name has no (valid) date.
+        """
+        for match in Reader.FILE_TIME.finditer(filename):
+            try:
+                return Timestamps.from_fields(*[int(field) for field in match.groups() if field is not None])[()] \
+                    .astype('datetime64[s]')
+            except ValueError:
+                pass
+        return None
+
+    @staticmethod
+    def directory_period(relative_path):
+        """
+        :param relative_path: directory path relative to the input directory, e.g. 2019/03
+        :return: (start, end) numpy datetime64 of a year, year/month or year/month/day directory, None for others.
+        """
+        parts = re.split(r'[\\/]', relative_path)
+        digits = ''.join(parts)
+        if not all(part.isdigit() for part in parts) or len(digits) not in (4, 6, 8):
+            return None
+        unit = {4: 'Y', 6: 'M', 8: 'D'}[len(digits)]
+        try:
+            start = np.datetime64('-'.join([digits[:4], digits[4:6], digits[6:8]][:len(digits) // 2 - 1]), unit)
+        except ValueError:
+            return None
+        return start.astype('datetime64[s]'), (start + 1).astype('datetime64[s]')
 
-        input_files.sort(key=lambda group: group['id'])
-        return input_files
+    @staticmethod
+    def overlaps(period, since, until):
+        """
+        :return: whether the period (start, end), None if unknown, overlaps the [since, until) time window.
+        """
+        return period is None or ((since is None or period[1] > since) and (until is None or period[0] < until))
+
+    @staticmethod
+    def within(time, since, until):
+        """
+        :return: whether time, None if unknown, is within the [since, until) time window.
+        """
+        return time is None or ((since is None or time >= since) and (until is None or time < until))
+
+    def time_window(self):
+        """
+        Time window of the input files, set by the input/since and input/until configs (or the --since and
+        --until arguments), e.g. 2019-03-08 or 2019-03-08T12:00.
+        :return: (since, until) numpy datetime64[s], None when not set
+        """
+        window = []
+        for key in ('since', 'until'):
+            value = self.input_option(key, None)
+            try:
+                window.append(None if value is None else np.datetime64(value, 's'))
+            except ValueError:
+                Logger.error('bad_time_window', key, value)
+        return tuple(window)
+
+    def input_option(self, key, default):
+        """
+        :param key: input config name, e.g. 'recursive'
+        :param default: value when the config is not set
+        :return: the parameters/input/key config
+        """
+        if self.configs is None or not self.configs.exists('parameters', 'input', key):
+            return default
+        value = self.config('input', key)
+        return default if value is None else value
+
+    def count_rows(self, input):
+        """
+        Planning pass: counts the rows an input file/group adds along the unlimited (time) dimension, reading
+        only its header and counting its lines, so that the output dimension can be created with its final
+        size (see output/presize_dimensions). The count must match the rows of the block returned by parse.
+        It should be overridden by the reader implementation when the count is cheap to get.
+        :param input: is file path.
+        When group_by is used, a tuple containing the group file paths.
+        :return: number of rows, None if unknown.
+        """
+        return None
+
+    def read_index(self, input):
+        """
+        Reads the index_columns values of an input file from its header only, for the input files index (see
+        Index). It should be overridden by the readers setting index_columns.
+        :param input: is file path.
+        :return: {column name: value}
+        """
+        raise NotImplementedError
 
     @abstractmethod
     def accepts_file(self, filename):
@@ -90,19 +260,114 @@ class Reader(ABC):
                     except Exception as e:
                         Logger.error('missing_reader_param', '/'.join(args), type(self).__name__)
         verify_block(self.required_params(), ['parameters'])
+        self.time_format()
 
-    @abstractmethod
     def read_to(self, output_dataset, input, configurations, index):
         """
         Reads an input file/group to the correspondent output dataset.
+        Kept for compatibility: readers implement parse (and optionally emit) instead.
         :param output_dataset: cdm/netcdf4 dataset.
         :param input: is file path.
         When group_by is used, a tuple containing the group file paths.
         :param configurations: configurations read from .yaml files
-        :param index:
+        :param index: whether the input is appended to previous inputs of the output dataset.
         :return: void
         """
-        pass
+        self.emit(output_dataset, self.parse(input), AppendContext.from_dataset(output_dataset, index))
+
+    def parse(self, input):
+        """
+        Parses an input file/group into a LidarBlock, without accessing the output dataset.
+        The configurations are available through self.configs.
+        :param input: is file path.
+        When group_by is used, a tuple containing the group file paths.
+        :return: LidarBlock
+        """
+        raise NotImplementedError
+
+    def iter_blocks(self, input, chunked=False):
+        """
+        Parses an input file/group into blocks of at most chunk_rows rows along the unlimited dimension, reading it
+        as the blocks are consumed, so that the memory held by a conversion does not depend on the input size.
+        The readers measure the memory held per row on the first rows of the input (see row_bytes) and set
+        info['max_rows'] of the blocks to the rows they are read in.
+        The blocks are appended in order to the output, the next ones having info['continued'] set. When the
+        input is the first of an output, the Builder sets info['input_rows'] of its first block to the rows of the
+        whole input (see count_rows), which sizes the output variables as for a single block.
+        Optional: readers which do not override it are parsed into a single block.
+        :param input: is file path.
+        When group_by is used, a tuple containing the group file paths.
+        :param chunked: whether to parse the input in blocks of bounded rows, False for a single block of the whole
+        input.
+        :return: LidarBlock generator
+        """
+        yield self.parse(input)
+
+    def row_bytes(self, lines):
+        """
+        Memory held per row of a block of iter_blocks while it is parsed and written, measured on the first row of
+        an input, from which the rows of the blocks are derived to fit the input/memory_budget config.
+        It should be overridden by the readers implementing iter_blocks.
+        :param lines: text lines of the first row of an input, as read
+        :return: bytes, None if unknown.
+        """
+        return None
+
+    def chunked(self):
+        """
+        :return: whether the inputs are parsed in blocks of bounded rows (see iter_blocks), i.e. the reader
+        implements it and the input/max_rows or input/memory_budget config is set.
+        """
+        return self.can_iterate() and (self.input_option('max_rows', None) is not None or
+                                       self.input_option('memory_budget', None) is not None)
+
+    def chunk_rows(self, row_bytes=None):
+        """
+        Maximum rows of the blocks of iter_blocks: the input/max_rows config, or the rows fitting in the
+        input/memory_budget config (in MiB), the smaller when both are set. max_rows bounds the rows held, and so
+        the memory; memory_budget is an estimate, its rows being derived from the memory per row measured by the
+        reader on the input (see row_bytes).
+        :param row_bytes: memory held per row, None if unknown (memory_budget is then not applied)
+        :return: number of rows, None when no limit applies (or the reader does not implement iter_blocks).
+        """
+        if not self.chunked():
+            return None
+        max_rows = self.input_option('max_rows', None)
+        budget = self.input_option('memory_budget', None)
+        if budget is not None and row_bytes:
+            budget_rows = max(1, int(float(budget) * 2 ** 20 // row_bytes))
+            max_rows = budget_rows if max_rows is None else min(int(max_rows), budget_rows)
+        return None if max_rows is None else max(1, int(max_rows))
+
+    def emit(self, output_dataset, block, context):
+        """
+        Writes (or appends) a block returned by parse to the output dataset.
+        Readers may override it to adapt a block to the data previously written to the dataset, which is
+        kept in the context rather than read back from the dataset.
+        :param output_dataset: cdm/netcdf4 dataset, kept open for all the inputs of an output block.
+        :param block: LidarBlock returned by parse.
+        :param context: AppendContext of the output block; context.appending tells whether the block is
+        appended to previous inputs.
+        :return: void
+        """
+        offset = context.n_rows if context.planned_rows else None
+        block.write_to(output_dataset, context.appending, context.variable_options, context.planned_rows, offset,
+                       block.info.get('input_rows'))
+        context.n_rows += block.n_rows()
+
+    def can_parse(self):
+        """
+        Checks if the reader implements the parse/emit API.
+        :return: boolean
+        """
+        return type(self).parse is not Reader.parse
+
+    def can_iterate(self):
+        """
+        Checks if the reader parses its inputs in blocks of bounded rows, see iter_blocks.
+        :return: boolean
+        """
+        return type(self).iter_blocks is not Reader.iter_blocks
 
     def group_id(self, filename):
         """
@@ -112,6 +377,47 @@ class Reader(ABC):
         """
         pass
 
+    def time_format(self):
+        """
+        Output form of the time coordinate, set by the output/time_format config:
+        'iso8601' (default) for ISO 8601 strings, 'numeric' for seconds since 1970-01-01 (CF convention).
+        :return: 'iso8601' | 'numeric'
+        """
+        if not self.configs.exists('parameters', 'output', 'time_format'):
+            return 'iso8601'
+        time_format = self.config('output', 'time_format')
+        if time_format not in ('iso8601', 'numeric'):
+            Logger.error('bad_time_format', time_format)
+        return time_format
+
+    def create_time(self, block, long_name='Time UTC in ISO 8601 format yyyy-mm-ddThh:mm:ssZ'):
+        """
+        Creates the time coordinate variable, in the form set by the output/time_format config.
+        :param block: LidarBlock
+        :param long_name: long name of the ISO 8601 form
+        :return: the time variable, to be filled with time_values
+        """
+        if self.time_format() == 'numeric':
+            time = block.createVariable('time', 'f8', ('time',))
+            time.units = 'seconds since 1970-01-01 00:00:00'
+            time.calendar = 'standard'
+            time.standard_name = 'time'
+            time.long_name = 'Time UTC'
+        else:
+            time = block.createVariable('time', str, ('time',))
+            time.units = 's'
+            time.long_name = long_name
+        return time
+
+    def time_values(self, timestamps):
+        """
+        :param timestamps: numpy datetime64 array
+        :return: the values of the time variable created by create_time
+        """
+        if self.time_format() == 'numeric':
+            return Timestamps.seconds_since(timestamps, Timestamps.UNIX_EPOCH)
+        return Timestamps.iso8601(timestamps)
+
     def config(self, *keys):
         return self.configs.get('parameters', *keys)
 
@@ -0,0 +1,198 @@
+from os import path, remove
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+import multiprocessing
+import socketserver
+import json
+import time
+import zlib
+
+from ..common.Logger import Logger
+from .Builder import Builder, ConversionError
+
+
+class Server:
+    """
+    Conversion daemon. Listens on a Unix socket or a localhost port for conversion jobs and runs them on a
+    pool of worker processes, which keep the python modules imported and cache the loaded configurations,
+    readers and writers (a Builder per configuration) between jobs.
+
+    The protocol is line based: each request is a JSON object on a single line, e.g.
+
+        {"config_file": "/data/config.yaml", "input_files": ["/data/in/User5_96_20190308_200500.hpl"]}
+
+    with the optional keys input_path, input_format, output_format (as the command arguments), input_files
+    (all the files of the input path when not given), resume and reload (to load the configurations again, which
+    is otherwise done when the configuration file or one of its imports was modified).
+    Jobs writing to the same output directory (the outputs and their manifest) are run one at a time, in
+    whichever worker, while the jobs of other output directories run in parallel.
+    Each request is answered with a JSON line:
+
+        {"status": "ok" | "error", "outputs": [...], "error": "...", "log": [...],
+         "timings": {"load": s, "convert": s, "total": s}, "cached": bool}
+    """
+
+    # number of output directory locks shared by the workers, see _output_locks
+    LOCKS = 64
+
+    def __init__(self, socket_path=None, port=None, workers=1):
+        """
+        Constructor.
+        :param socket_path: Unix socket path
+        :param port: localhost port, used when no socket path is given
+        :param workers: number of worker processes (0 uses all cpus)
+        """
+        if socket_path is None and port is None:
+            raise ValueError('A socket path or a port is required.')
+        self.socket_path = socket_path
+        self.port = port
+        self.workers = workers if workers else multiprocessing.cpu_count()
+
+    def serve_forever(self):
+        """
+        Accepts and runs conversion jobs until interrupted (Ctrl+C).
+        :return: void
+        """
+        # forked workers start with the modules already imported, and inherit the output directory locks
+        context = multiprocessing.get_context('fork')
+        locks = [context.Lock() for _ in range(Server.LOCKS)]
+        with ProcessPoolExecutor(self.workers, context,
+                                 initializer=_init_worker, initargs=(Logger.get_args(), locks)) as pool:
+            # the workers are started before the server threads, which should not be forked
+            for future in [pool.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+
+            handler = type('Handler', (_JobHandler,), {'pool': pool})
+            if self.socket_path is not None:
+                if path.exists(self.socket_path):
+                    remove(self.socket_path)
+                server = socketserver.ThreadingUnixStreamServer(self.socket_path, handler)
+                address = self.socket_path
+            else:
+                server = socketserver.ThreadingTCPServer(('127.0.0.1', self.port), handler)
+                address = '127.0.0.1:{}'.format(self.port)
+
+            with server:
+                server.daemon_threads = True
+                Logger.log('serving', address, self.workers)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    Logger.info('done')
+                finally:
+                    if self.socket_path is not None and path.exists(self.socket_path):
+                        remove(self.socket_path)
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """
+    Reads the JSON requests of a connection, one per line, and answers each when its job is done.
+    """
+
+    pool = None
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict) or 'config_file' not in job:
+                    raise ValueError('A job is a JSON object with (at least) a config_file.')
+                reply = self.pool.submit(_run_job, job).result()
+            except Exception as e:
+                reply = {'status': 'error', 'error': repr(e)}
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+            self.wfile.flush()
+
+
+def _ready():
+    return True
+
+
+# locks shared by the worker processes, see _output_locks
+_locks = []
+
+# Builders of a worker process, by configuration file: (job signature, Builder)
+_builders = {}
+
+
+def _init_worker(args, locks):
+    """
+    Worker process initializer.
+    :param args: Logger arguments, see Logger.set_args
+    :param locks: output directory locks created by the server
+    :return: void
+    """
+    global _locks
+    Logger.set_args(args)
+    _locks = locks
+
+
+def _builder(job):
+    """
+    :param job: conversion job
+    :return: (Builder of the job configuration, whether it was cached)
+    """
+    config_file = path.abspath(job['config_file'])
+    signature = (job.get('input_path'), job.get('input_format'), job.get('output_format'))
+    # a single Builder is kept per configuration file: it is replaced when the file or one of its imports was
+    # modified since it was loaded, or for other arguments
+    cached = _builders.get(config_file)
+    if cached is not None and cached[0] == signature and not cached[1].configs.modified() and not job.get('reload'):
+        return cached[1], True
+
+    builder = Builder(config_file=config_file, input_path=job.get('input_path'),
+                      input_format=job.get('input_format'), output_format=job.get('output_format'))
+    _builders[config_file] = (signature, builder)
+    return builder, False
+
+
+def _output_locks(builder):
+    """
+    Acquires the locks of the output directories of a Builder, so that no other worker appends to its outputs
+    or rewrites their manifest meanwhile. The directories share LOCKS locks, by a hash of their path; these are
+    acquired in order, which avoids deadlocks between jobs of several output formats.
+    :param builder: Builder of the job
+    :return: context manager holding the locks
+    """
+    output_path = builder.configs.get_resolved('parameters', 'output', 'path')
+    indexes = sorted({zlib.crc32(path.abspath(directory).encode()) % len(_locks)
+                      for _, directory, _ in builder.outputs(output_path)}) if _locks else []
+    stack = ExitStack()
+    for index in indexes:
+        stack.enter_context(_locks[index])
+    return stack
+
+
+def _run_job(job):
+    """
+    Worker process entry point. Runs a conversion job, buffering the Logger messages.
+    :param job: conversion job, see Server
+    :return: reply dictionary
+    """
+    Logger.capture()
+    started = time.perf_counter()
+    loaded = None
+    reply = {'status': 'ok', 'outputs': []}
+    try:
+        builder, reply['cached'] = _builder(job)
+        loaded = time.perf_counter()
+        with _output_locks(builder):
+            reply['outputs'] = builder.build_files(job.get('input_files'), bool(job.get('resume')))
+    except ConversionError as e:
+        Logger.debug(e.details)
+        reply.update({'status': 'error', 'error': Logger.messages['failed_group'].format(e.files, e.cause)})
+    except SystemExit:
+        # configuration errors are reported (last) by the Logger, which ends the program
+        reply['status'] = 'error'
+    except Exception as e:
+        reply.update({'status': 'error', 'error': repr(e)})
+
+    finished = time.perf_counter()
+    loaded = loaded if loaded is not None else finished
+    reply['timings'] = {'load': loaded - started, 'convert': finished - loaded, 'total': finished - started}
+    reply['log'] = Logger.release()
+    if reply['status'] == 'error' and 'error' not in reply:
+        reply['error'] = reply['log'][-1] if reply['log'] else 'Failed.'
+    return reply
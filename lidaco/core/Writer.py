@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
 from os import path
+import numpy as np
+
+from ..common.Logger import Logger
 
 
 class Writer(ABC):
@@ -9,6 +12,18 @@ class Writer(ABC):
 
     dir_path = None
     name = None
+    # whether inputs can be appended to a file written by a previous conversion
+    appendable = False
+    # whether the output records the metadata (dimensions, attributes, variable types) but not the data, which
+    # the readers may then skip parsing (see Reader.metadata_only)
+    metadata_only = False
+
+    # netCDF4 createVariable keywords accepted by the output/compression config
+    STORAGE_OPTIONS = ('compression', 'zlib', 'complevel', 'shuffle', 'fletcher32', 'contiguous', 'chunksizes',
+                       'szip_coding', 'szip_pixels_per_block', 'blosc_shuffle', 'significant_digits',
+                       'quantize_mode', 'least_significant_digit')
+    # target size of the default chunks of (time, ...) variables
+    CHUNK_BYTES = 2 ** 20
 
     def __init__(self, dir_path, name):
         """
@@ -21,6 +36,12 @@ class Writer(ABC):
         self.dir_path = dir_path
         self.name = name
         self.append = False
+        self.configs = None
+        self._storage = None
+
+    def set_configs(self, configs):
+        self.configs = configs
+        self._storage = None
 
     def file_path(self):
         """
@@ -37,6 +58,64 @@ class Writer(ABC):
         """
         pass
 
+    def storage(self):
+        """
+        Reads the output/compression config, e.g.
+
+            compression:
+              compression: zlib
+              complevel: 4
+              shuffle: True
+              variables:
+                VEL:
+                  chunksizes: [2048, 150]
+
+        :return: (global options, {variable name: options})
+        """
+        if self._storage is None:
+            options = {}
+            if self.configs is not None and self.configs.exists('parameters', 'output', 'compression'):
+                options = dict(self.configs.get('parameters', 'output', 'compression') or {})
+            variables = options.pop('variables', None) or {}
+            for key in list(options) + [key for var in variables.values() for key in (var or {})]:
+                if key not in Writer.STORAGE_OPTIONS:
+                    Logger.error('bad_storage_option', key, ', '.join(Writer.STORAGE_OPTIONS))
+            self._storage = options, variables
+        return self._storage
+
+    def variable_options(self, name, datatype, dimensions, shape, rows=None):
+        """
+        Storage options (compression filters, chunk sizes) of an output variable, as keyword arguments of the
+        netCDF4 createVariable. Variables along an unlimited dimension (time) with other dimensions, e.g.
+        (time, range), are chunked by default in chunks of whole rows, as many as the first input has (up to
+        about CHUNK_BYTES), so that they can be read along time without padding small files with empty chunks.
+        The output/compression config sets filters for all the variables and overrides them, or the chunk
+        sizes, per variable.
+        :param name: variable name
+        :param datatype: netcdf4 data type
+        :param dimensions: dimension names tuple
+        :param shape: dimension sizes tuple, None for unlimited dimensions
+        :param rows: number of rows of the first input along the unlimited dimension, if known
+        :return: dictionary of createVariable keyword arguments
+        """
+        if datatype is str or not dimensions:
+            # variable length strings and scalars cannot be chunked nor filtered
+            return {}
+
+        options, variables = self.storage()
+        options = dict(options)
+        options.update(variables.get(name) or {})
+
+        if 'chunksizes' in options:
+            options['chunksizes'] = tuple(options['chunksizes'])
+        elif not options.get('contiguous') and shape[0] is None and len(shape) > 1 and None not in shape[1:]:
+            row_bytes = max(np.dtype(datatype).itemsize * int(np.prod(shape[1:])), 1)
+            n_rows = max(1, Writer.CHUNK_BYTES // row_bytes)
+            if rows:
+                n_rows = min(n_rows, rows)
+            options['chunksizes'] = (n_rows,) + tuple(shape[1:])
+        return options
+
     def appending(self, append):
         """
         Sets the writer appending mode.
@@ -2,8 +2,17 @@
 
 """
 
+from . import AppendContext
+from . import Batch
 from . import Builder
 from . import Config
+from . import Converter
+from . import Index
+from . import LidarBlock
+from . import Manifest
+from . import MetadataDataset
 from . import ModuleLoader
+from . import ParseCache
 from . import Reader
+from . import Server
 from . import Writer
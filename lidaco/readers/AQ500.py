@@ -1,6 +1,9 @@
 import numpy as np
 from ..core.Reader import Reader
-import datetime
+from ..core.LidarBlock import LidarBlock
+from ..common.Table import Table
+from ..common.Timestamps import Timestamps
+from ..common.Opener import Opener
 
 class AQ500(Reader):
 
@@ -47,10 +50,11 @@ class AQ500(Reader):
     def output_filename(self, filename):
         return filename[:-4]
 
-    def read_to(self, output_dataset, input_filepath, configs, appending):
+    def parse(self, input_filepath):
+        block = LidarBlock()
 
         # read file
-        with open(input_filepath, encoding='latin-1') as f:
+        with Opener.open(input_filepath, encoding='latin-1') as f:
             data = f.readlines()
             data = [line.strip() for line in data]
             temp_headerlength = data.index('[EOH]')
@@ -62,71 +66,70 @@ class AQ500(Reader):
             datafield = {line.split(':')[1].strip() : np.array((line.split(':')[0][11:]).split(','),dtype=int)-2 for line in data[:temp_headerlength] if (':' in line)}
             
             # create the dimensions
-            output_dataset.createDimension('range', len(parameters['Measurement heights']))
-            output_dataset.createDimension('time', None)
+            block.createDimension('range', len(parameters['Measurement heights']))
+            block.createDimension('time', None)
 
             # create the coordinate variables
-            range1 = output_dataset.createVariable('range', 'f4', ('range',))
+            range1 = block.createVariable('range', 'f4', ('range',))
             range1.units = 'm'
             range1.long_name = 'range_gate_distance_from_lidar'
             range1[:] = np.array(parameters['Measurement heights'])
 
-            time = output_dataset.createVariable('time', str, ('time',))
-            time.units = 's'
-            time.long_name = 'Time UTC in ISO 8601 format yyyy-mm-ddThh:mm:ssZ'
+            self.create_time(block)
 
             # create the data variables
-            scan_type = output_dataset.createVariable('scan_type', 'i')
+            scan_type = block.createVariable('scan_type', 'i')
             scan_type.units = 'none'
             scan_type.long_name = 'scan_type_of_the_measurement'
             scan_type[:] = 1
 
-            accumulation_time = output_dataset.createVariable('accumulation_time', 'f4')
+            accumulation_time = block.createVariable('accumulation_time', 'f4')
             accumulation_time.units = 'seconds'
             accumulation_time.long_name = 'time_for_spectral_accumulation'
             accumulation_time[:] = 1.0
 
             # create the measurement variables
-            T_external = output_dataset.createVariable('T_external', 'f4', ('time',))
+            T_external = block.createVariable('T_external', 'f4', ('time',))
             T_external.units = 'degrees C'
             T_external.long_name = 'temperature'
 
-            rh = output_dataset.createVariable('rh', 'f4', ('time',))
+            rh = block.createVariable('rh', 'f4', ('time',))
             rh.units = 'degrees'
             rh.long_name = 'lidar_yaw_angle'
             
-            p = output_dataset.createVariable('p', 'f4', ('time',))
+            p = block.createVariable('p', 'f4', ('time',))
             p.units = 'degrees'
             p.long_name = 'lidar_yaw_angle'
 
-            WS = output_dataset.createVariable('WS', 'f4', ('time', 'range'))
+            WS = block.createVariable('WS', 'f4', ('time', 'range'))
             WS.units = 'm.s-1'
             WS.long_name = 'mean of scalar wind speed'
             
-            DIR = output_dataset.createVariable('DIR', 'f4', ('time', 'range'))
+            DIR = block.createVariable('DIR', 'f4', ('time', 'range'))
             DIR.units = 'degrees north'
             DIR.long_name = 'wind direction from north'
             
-            signal_quality = output_dataset.createVariable('signal_quality', 'f4', ('time', 'range'))
+            signal_quality = block.createVariable('signal_quality', 'f4', ('time', 'range'))
             signal_quality.units = 'percent'
             signal_quality.long_name = 'signal quality'
 
             # create np.array of dataset without timestamp and cast to float
-            data_timeseries = [line[:-1].split(',') for line in data[temp_headerlength+2:-2]]
-            data_timeseries_array = np.array(data_timeseries)[:,1:].astype(float)
+            table = Table([line[:-1] for line in data[temp_headerlength+2:-2]], sep=',')
+            data_timeseries_array = table.columns(slice(1, None))
             
-            timestamp_input = [datetime.datetime.strptime(row[0],'%Y%m%d %H:%M') for row in data_timeseries]
-            timestamp_iso8601 = [value.isoformat()+'Z' for value in timestamp_input]
-            output_dataset.variables['time'][:] = np.array(timestamp_iso8601)
+            timestamps = Timestamps.parse(table.text(0), '%Y%m%d %H:%M')
+            block.variables['time'][:] = self.time_values(timestamps)
 
-            output_dataset.variables['T_external'][:] = data_timeseries_array[:,datafield['Temperature sensor(deg C * 10)=True']]
-            output_dataset.variables['rh'][:] = data_timeseries_array[:,datafield['Humidity sensor(%RH)=True']]
-            output_dataset.variables['p'][:] = data_timeseries_array[:,datafield['Pressure sensor(Hp)=False']]
+            block.variables['T_external'][:] = data_timeseries_array[:,datafield['Temperature sensor(deg C * 10)=True']]
+            block.variables['rh'][:] = data_timeseries_array[:,datafield['Humidity sensor(%RH)=True']]
+            block.variables['p'][:] = data_timeseries_array[:,datafield['Pressure sensor(Hp)=False']]
 
             # e.g. radial velocity starts at 5th column and is then repeated every 9th column
-            output_dataset.variables['WS'][:, :] = AQ500.correct_ws(data_timeseries_array[:,datafield['Speed m/s(LL to HL)']], parameters['Measurement heights'])
-            output_dataset.variables['DIR'][:, :] = data_timeseries_array[:,datafield['Dir degrees(LL to HL)']]
+            block.variables['WS'][:, :] = AQ500.correct_ws(data_timeseries_array[:,datafield['Speed m/s(LL to HL)']], parameters['Measurement heights'])
+            block.variables['DIR'][:, :] = data_timeseries_array[:,datafield['Dir degrees(LL to HL)']]
             
             # there is an error reading signal_quality for our data because there are only 30 columns, but 31 heights
             # we commented it out but it might be useful for future measurements
-            # output_dataset.variables['signal_quality'][:, :] = data_timeseries_array[:,datafield['Quality(S/N*10)(LL to HL)']]
\ No newline at end of file
+            # block.variables['signal_quality'][:, :] = data_timeseries_array[:,datafield['Quality(S/N*10)(LL to HL)']]
+
+        return block
@@ -1,6 +1,9 @@
 from ..core.Reader import Reader
+from ..core.LidarBlock import LidarBlock
+from ..common.Table import Table
+from ..common.Timestamps import Timestamps
+from ..common.Opener import Opener
 import numpy as np
-import datetime
 
 # Change this to parameters, if necessary.
 doppler_index = 1
@@ -10,19 +13,7 @@ azimuth_index = 4
 elevation_index = 5
 pitch_index = 6
 roll_index = 7
-
-
-def chunks(l, n):
-    for i in range(0, len(l), n):
-        yield l[i:i + n]
-
-
-def process_time(timestamp):
-    y, m, d = timestamp[:10].split('-')
-    h, min_, s = timestamp[11:19].split(':')
-    ms = timestamp[20:]
-    dt = datetime.datetime(int(y), int(m), int(d), int(h), int(min_), int(s), int(ms) * 1000)
-    return dt.timestamp()
+time_format = '%Y-%m-%d %H:%M:%S.%f'
 
 
 def create_variables(group, azimuth, elevation, _yaw, _pitch, _roll, doppler, intensity):
@@ -97,12 +88,13 @@ class Galion(Reader):
     def required_params(self):
         return ['n_gates', 'range_gates', 'constant_gates', 'measurement_scenarios']
 
-    def read_to(self, output_dataset, input_filepath, configs, appending):
-        with open(input_filepath) as file:
-            nr_gates = configs['parameters']['n_gates']
-            range_gates = configs['parameters']['range_gates']
-            constant_gates = configs['parameters']['constant_gates']
-            measurement_scenarios = configs['parameters']['measurement_scenarios']
+    def parse(self, input_filepath):
+        block = LidarBlock()
+        with Opener.open(input_filepath) as file:
+            nr_gates = self.configs['parameters']['n_gates']
+            range_gates = self.configs['parameters']['range_gates']
+            constant_gates = self.configs['parameters']['constant_gates']
+            measurement_scenarios = self.configs['parameters']['measurement_scenarios']
             raw_file = file.readlines()
 
             # if we can assume that the metadata is always the same length
@@ -110,15 +102,20 @@ class Galion(Reader):
             metadata = raw_file[:6]
             data = raw_file[6:]
 
-            scans = np.array(list(chunks([row.strip().split('\t') for row in data], int(nr_gates))))
+            # measurements of each scan, i.e. arrays of n_scans x n_gates
+            table = Table(data)
+            columns = table.read({'doppler': doppler_index, 'intensity': intensity_index, 'azimuth': azimuth_index,
+                                  'elevation': elevation_index, 'pitch': pitch_index, 'roll': roll_index}, 'f4')
+            scans = {name: np.reshape(values, (-1, int(nr_gates))) for name, values in columns.items()}
+            n_scans = len(scans['doppler'])
 
             # create the dimensions
-            output_dataset.createDimension('range', nr_gates)
-            output_dataset.createDimension('time', len(scans))
+            block.createDimension('range', nr_gates)
+            block.createDimension('time', n_scans)
 
             # create the coordinate variables
             # range
-            range1 = output_dataset.createVariable('range', 'f4', ('range',))
+            range1 = block.createVariable('range', 'f4', ('range',))
             range1.units = 'm'
             range1.long_name = 'range_gate_distance_from_lidar'
             if constant_gates:
@@ -128,29 +125,29 @@ class Galion(Reader):
             range1.comment = ''
 
             # time
-            time = output_dataset.createVariable('time', 'f4', ('time',))
+            time = block.createVariable('time', 'f4', ('time',))
             time.units = 's'
             start_time_kv = metadata[4]
             start_time_str = start_time_kv[start_time_kv.find('\t') + 1:start_time_kv.find('\n')]
-            start_time_seconds = process_time(start_time_str)
+            start_time = Timestamps.parse([start_time_str], time_format)[0]
             time.long_name = 'seconds since ' + start_time_str
             # array manipulation to obtain timestamps
-            timestamps = (scans[:, :, time_index])[:, 0]
-            time[:] = np.array(list(map(lambda x: process_time(x) - start_time_seconds, timestamps)))
+            timestamps = np.reshape(table.text(time_index), (-1, int(nr_gates)))[:, 0]
+            time[:] = Timestamps.seconds_since(Timestamps.parse(timestamps, time_format), start_time)
             time.comment = ''
 
             # create the data variables
-            scan_type = output_dataset.createVariable('scan_type', 'i', 'time')
+            scan_type = block.createVariable('scan_type', 'i', 'time')
             scan_type.units = 'none'
             scan_type.long_name = 'scan_type_of_the_measurement'
 
-            scan_id = output_dataset.createVariable('scan_id', 'i', 'time')
+            scan_id = block.createVariable('scan_id', 'i', 'time')
             scan_id.units = 'none'
             scan_id.long_name = 'scan_id_of_the_measurement'
 
-            create_variables(output_dataset, (scans[:, :, azimuth_index])[:, 0], (scans[:, :, elevation_index])[:, 0], np.zeros(len(scans)),
-                             (scans[:, :, pitch_index])[:, 0], (scans[:, :, roll_index])[:, 0],
-                             (scans[:, :, doppler_index]), (scans[:, :, intensity_index]))
+            create_variables(block, scans['azimuth'][:, 0], scans['elevation'][:, 0], np.zeros(n_scans),
+                             scans['pitch'][:, 0], scans['roll'][:, 0],
+                             scans['doppler'], scans['intensity'])
 
             invalid_scans = 0
             scan_index = 1
@@ -163,25 +160,27 @@ class Galion(Reader):
                     for ss in split_scans:
                         invalid_scans += int(ss.split('-')[1]) - int(ss.split('-')[0]) + 1
                 else:
-                    scan_group = output_dataset.createGroup('scan_' + str(scan_index) + '_' + long_name)
-                    _azimuth = np.zeros(len(scans))
-                    _elevation = np.zeros(len(scans))
-                    _yaw = np.zeros(len(scans))
-                    _pitch = np.zeros(len(scans))
-                    _roll = np.zeros(len(scans))
-                    _doppler = np.zeros(shape=[len(scans), int(nr_gates)])
-                    _intensity = np.zeros(shape=[len(scans), int(nr_gates)])
+                    scan_group = block.createGroup('scan_' + str(scan_index) + '_' + long_name)
+                    _azimuth = np.zeros(n_scans)
+                    _elevation = np.zeros(n_scans)
+                    _yaw = np.zeros(n_scans)
+                    _pitch = np.zeros(n_scans)
+                    _roll = np.zeros(n_scans)
+                    _doppler = np.zeros(shape=[n_scans, int(nr_gates)])
+                    _intensity = np.zeros(shape=[n_scans, int(nr_gates)])
                     split_scans = records.split(';')
                     for ss in split_scans:
                         initial_index = int(ss.split('-')[0]) - (invalid_scans + 1)
                         final_index = int(ss.split('-')[1]) - (invalid_scans + 1)
                         scan_type[initial_index:final_index + 1] = _type
                         scan_id[initial_index:final_index + 1] = scan_index
-                        _azimuth[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, azimuth_index][:, 0]
-                        _elevation[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, elevation_index][:, 0]
-                        _pitch[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, pitch_index][:, 0]
-                        _roll[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, roll_index][:, 0]
-                        _doppler[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, doppler_index]
-                        _intensity[initial_index:final_index + 1] = scans[initial_index:final_index + 1, :, intensity_index]
+                        _azimuth[initial_index:final_index + 1] = scans['azimuth'][initial_index:final_index + 1, 0]
+                        _elevation[initial_index:final_index + 1] = scans['elevation'][initial_index:final_index + 1, 0]
+                        _pitch[initial_index:final_index + 1] = scans['pitch'][initial_index:final_index + 1, 0]
+                        _roll[initial_index:final_index + 1] = scans['roll'][initial_index:final_index + 1, 0]
+                        _doppler[initial_index:final_index + 1] = scans['doppler'][initial_index:final_index + 1]
+                        _intensity[initial_index:final_index + 1] = scans['intensity'][initial_index:final_index + 1]
                     create_variables(scan_group, _azimuth, _elevation, _yaw, _pitch, _roll, _doppler, _intensity)
                     scan_index += 1
+
+        return block
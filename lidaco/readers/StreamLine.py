@@ -52,13 +52,18 @@ Todo:
 """
 
 # import builtin packages
-from _datetime import datetime
+from datetime import datetime, timezone
+from itertools import islice, chain
+import sys
 
 # import pypi packages
 import numpy as np
 
 # import user packages
 from ..core.Reader import Reader
+from ..core.LidarBlock import LidarBlock
+from ..common.Table import Table
+from ..common.Opener import Opener
 
 
 def get_scan_type(file_name):
@@ -77,26 +82,72 @@ def get_scan_type(file_name):
         return 5
 
 
-def decimaltime2sec(dt, day):
-    """convert decimal time to str"""
-    time_hours = dt
-    time_minutes = time_hours * 60
-    time_seconds = time_minutes * 60
-
-    hours_part = (time_hours % 60).astype(int)
-    minutes_part = (time_minutes % 60).astype(int)
-    seconds_part = (time_seconds % 60).astype(int)
-    microsec_part = (((time_seconds % 60) - seconds_part) * 1.E6).astype(int)
-    alltime = []
-    for i, j, k, l in zip(hours_part, minutes_part, seconds_part, microsec_part):
-        date = day + ' ' + "{h:02d}:{m:02d}:{s:02d}.{ms:06d}".format(h=i, m=j, s=k, ms=l)
-        date = datetime.strptime(date, '%Y%m%d %H:%M:%S.%f')
-        alltime.append(date.timestamp())
-    return np.array(alltime)
+def parse_values(text, n_columns):
+    """
+    Converts whitespace separated numbers, e.g. lines of a data section, at once.
+    :param text: numbers text
+    :param n_columns: number of columns of each line
+    :return: (lines, n_columns) float64 array
+    """
+    values = np.fromstring(text, dtype='f8', sep=' ')
+    if values.size % n_columns:
+        raise ValueError('Expected lines of {} values, read {} values.'.format(n_columns, values.size))
+    return values.reshape(-1, n_columns)
+
+
+def parse_rays(data, n_gates):
+    """
+    Converts the data section of a .hpl file, after the **** line, with a single numeric conversion. Each ray
+    is a record of an info line (5 values: decimal time, azimuth, elevation, pitch, roll) followed by a line per
+    range gate (4 values: range gate, doppler, intensity, backscatter), the numbers of columns being read from
+    the first ray.
+    :param data: data section text
+    :param n_gates: number of range gates
+    :return: (ray info (n_rays, 5) float64 array, gate data (n_rays, n_gates, 4) float32 array); the decimal
+    times keep the float64 precision, the gate data is stored as float32.
+    """
+    n_info, n_values = ray_columns(data)
+    rays = parse_values(data, n_info + n_gates * n_values)
+    return rays[:, :n_info].copy(), rays[:, n_info:].reshape(len(rays), n_gates, n_values).astype('f4')
+
+
+def ray_columns(data):
+    """
+    :param data: data section text
+    :return: (number of values of the info line, number of values of a gate line) of the first ray
+    """
+    lines = data.lstrip().split('\n', 2)
+    if len(lines) < 2:
+        raise ValueError('No rays found in the data section.')
+    return len(lines[0].split()), len(lines[1].split())
+
+
+def decimal_hours_to_epoch(hours, start_time, previous=None):
+    """
+    Converts the decimal hours of the day of the rays into UTC epoch seconds, with array arithmetic. The day is
+    that of the file start time (or of the previous ray), incremented each time the hours wrap around midnight
+    (decrease by more than half a day, smaller decreases being clock jitter) for files measuring past midnight.
+    :param hours: decimal hours array, e.g. [23.99, 0.01]
+    :param start_time: Start time of the file header, e.g. 20190308 20:05:03.76
+    :param previous: epoch seconds of the ray preceding the hours, when they continue previous rays of the file
+    :return: float64 epoch seconds array
+    """
+    if previous is None:
+        previous = datetime.strptime(start_time, '%Y%m%d %H:%M:%S.%f').replace(tzinfo=timezone.utc).timestamp()
+    midnight = previous - previous % 86400
+    previous_hours = (previous - midnight) / 3600
+
+    hours = np.asarray(hours, dtype=np.float64)
+    # rays are compared to the previous one, the first ray to the file start time (or the previous ray)
+    days = np.cumsum(np.diff(hours, prepend=previous_hours) < -12)
+    return (midnight + days * 86400) + hours * 3600
 
 
 class StreamLine(Reader):
 
+    index_columns = (('start_time', 'TEXT'), ('n_gates', 'INTEGER'), ('range_gate_length', 'REAL'),
+                     ('n_rays', 'INTEGER'), ('scan_type', 'TEXT'), ('scan_type_id', 'INTEGER'))
+
     def __init__(self):
         super().__init__(False)
 
@@ -117,6 +168,8 @@ class StreamLine(Reader):
         header[parameter[0]] = ':'.join([i.lstrip().rstrip() for i in parameter[1:]])
         while 'Resolution (m/s)' not in line:
             line = fd.readline()
+            if not line:
+                raise ValueError('The header ends before its Resolution (m/s) line.')
             parameter = line.split(':')
             header[parameter[0]] = ':'.join([i.lstrip().rstrip() for i in parameter[1:]])
         # convert header values to appropriate type
@@ -127,14 +180,58 @@ class StreamLine(Reader):
                 pass
         return header
 
-    def read_to(self, dataset, input_filepath, configs, appending):
+    def read_index(self, input_filepath):
+        with Opener.open(input_filepath, 'r') as file:
+            header = self.read_header(file)
+
+        start_time = datetime.strptime(header['Start time'], '%Y%m%d %H:%M:%S.%f')
+        return {
+            # ISO 8601, compared as text to select time windows
+            'start_time': start_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            'n_gates': int(header['Number of gates']),
+            'range_gate_length': header['Range gate length (m)'],
+            'n_rays': int(header['No. of rays in file']),
+            'scan_type': str(header['Scan type']),
+            # as the scan_type variable of the outputs
+            'scan_type_id': get_scan_type(header['Filename']),
+        }
+
+    def count_rows(self, input_filepath):
+        # a ray is an info line followed by a line per range gate
+        n_lines = Table.count_rows(input_filepath, marker='****')
+        return -(-n_lines // (int(self.config('n_gates')) + 1))
+
+    def parse(self, input_filepath):
+        blocks = self.iter_blocks(input_filepath)
+        try:
+            return next(blocks)
+        finally:
+            blocks.close()
+
+    def row_bytes(self, lines):
+        # the lines of a block are held as read (str objects) while they are joined into its text, whose memory
+        # the allocator keeps for the next lines, and the text is parsed into float64 values and then the float32
+        # arrays of the block
+        n_values = len(''.join(lines).split())
+        text = sum(len(line) for line in lines)
+        return sum(sys.getsizeof(line) + 8 for line in lines) + text + 8 * n_values + 2 * 4 * n_values
+
+    def iter_blocks(self, input_filepath, chunked=False):
+        """
+        Parses an input file into blocks of at most chunk_rows rays, see Reader.iter_blocks. The memory held per
+        ray is measured on the first ray of the file. The blocks continue the time stamps (and day) of the
+        previous rays of the file.
+        :param input_filepath: input file path
+        :param chunked: whether to parse the file in blocks of bounded rays, False for a single block
+        :return: LidarBlock generator
+        """
 
         # read required parameters from config
-        nr_gates = configs['parameters']['n_gates']
-        range_gates = configs['parameters']['range_gates']
+        nr_gates = self.config('n_gates')
+        range_gates = self.config('range_gates')
 
         # for every file to read open and process it
-        with open(input_filepath, 'r') as file:
+        with Opener.open(input_filepath, 'r') as file:
             # read in header
             header = self.read_header(file)
 
@@ -143,217 +240,217 @@ class StreamLine(Reader):
             while '****' not in line:
                 line = file.readline()
 
-            # read rest of file containing measurement data
-            raw_file = file.readlines()
+            # check variables in header
+            assert float(nr_gates) == header['Number of gates']
+            assert float(range_gates) == header['Range gate length (m)']
+
+            previous = None
+            max_rows = None
+            first = []
+            if chunked:
+                # a ray is an info line followed by a line per range gate
+                first = list(islice(file, int(nr_gates) + 1))
+                max_rows = self.chunk_rows(self.row_bytes(first))
+            while True:
+                # read the measurement data, as a single buffer of whole rays
+                if max_rows is None:
+                    data = ''.join(first) + file.read()
+                else:
+                    data = ''.join(chain(first, islice(file, max_rows * (int(nr_gates) + 1) - len(first))))
+                first = []
+                if previous is not None and not data.strip():
+                    break
+
+                block = self.rays_block(header, data, previous)
+                del data
+                block.info['max_rows'] = max_rows
+                if previous is not None:
+                    block.info['continued'] = True
+                yield block
+
+                if max_rows is None:
+                    break
+                # the block is released before the next one is read
+                previous = block.info['timestamps'][-1]
+                del block
         # file closed
 
-        # check variables in header
-        assert float(nr_gates) == header['Number of gates']
-        assert float(range_gates) == header['Range gate length (m)']
-
-        # split the info line for every ray from the rest of the data
+    def rays_block(self, header, data, previous=None):
+        """
+        Parses rays of the data section of a file into a LidarBlock.
+        :param header: file header, as returned by read_header
+        :param data: text of whole rays of the data section
+        :param previous: epoch seconds of the ray preceding these ones in the file, None for the first rays
+        :return: LidarBlock
+        """
+        nr_gates = self.config('n_gates')
+
+        # every ray is an info line followed by a line per range gate
         # measured_info contains timestamp, azimut, elevation, pitch and roll
         # i.e. 20.084231  39.81  -0.00 -0.20 0.10
-        # all lines n*n_gates with 0 <= n < number of rays
-        measured_info_s = raw_file[::int(nr_gates) + 1]
-
-        # convert the measured info from list of str to numpy array
-        measured_info = np.empty((len(measured_info_s), 5))
-        # for i in range(len(measured_info_s)):
-        #     measured_info[i, :] = np.fromstring(measured_info_s[i], dtype='f4', sep=' ')
-        for i, line in enumerate(measured_info_s):
-            measured_info[i, :] = np.fromstring(line, dtype='f4', sep=' ')
-
-        # convert the time stamp from decimal hour of day to epoch double format
-        header_day = header['Start time'].split(' ')[0]
-        measured_info[:, 0] = decimaltime2sec(measured_info[:, 0], header_day)
-
-        # the rest is the actual data with range gate number, doppler,
-        # intensity and backscatter
+        # measured_data contains range gate number, doppler, intensity and backscatter
         # i.e.   0 -0.2173 1.135933  7.655162E-6
         #        1 -0.2173 1.127027  7.154400E-6
-        del(raw_file[::int(nr_gates+1)])
-        measured_data_s = [x.lstrip().rstrip() for x in raw_file]
+        if self.metadata_only:
+            # the data is not written, only its shape is needed
+            n_info, n_values = ray_columns(data)
+            lines = data.strip().split('\n')
+            measured_info = parse_values(' '.join(lines[::int(nr_gates) + 1]), n_info)
+            measured_data = np.broadcast_to(np.float32(np.nan), (len(measured_info), int(nr_gates), n_values))
+        else:
+            measured_info, measured_data = parse_rays(data, int(nr_gates))
 
-        # convert measured data from list of str to numpy array
-        measured_data = np.empty((len(measured_data_s), 4))
-        # for i in range(len(measured_data_s)):
-        #     measured_data[i, :4] = np.fromstring(measured_data_s[i], dtype='f4', sep=' ')
-        for i, line in enumerate(measured_data_s):
-            measured_data[i, :4] = np.fromstring(line, dtype='f4', sep=' ')
+        # convert the time stamp from decimal hour of day to epoch double format
+        measured_info[:, 0] = decimal_hours_to_epoch(measured_info[:, 0], header['Start time'], previous)
+
+        block = LidarBlock()
+        # absolute timestamps, used to rebase time when appending to a previous file
+        block.info['timestamps'] = measured_info[:, 0]
 
         # Dimensions
         n_rays = int(measured_info.shape[0])
-        n_gates = int(header['Number of gates'])
-
-        # Initialize the data set if not appending to existing data
-        if not appending:
-            # create the dimensions
-            dataset.createDimension('range', header['Number of gates'])
-            # the time dimension must be without limits (None) to append later
-            dataset.createDimension('time', None)
-
-            # create the coordinate variables
-
-            # range
-            # see header of measurement file
-            # Center of gate = (range gate + 0.5) * Gate length
-            gate_length = header['Range gate length (m)']
-            _range_dist = (measured_data[0:nr_gates, 0] + 0.5) * gate_length
-            range_dist = dataset.createVariable('range', 'f4', ('range',))
-            range_dist.units = 'm'
-            range_dist.long_name = 'range_gate_distance_from_lidar'
-            range_dist[:] = _range_dist
-            range_dist.comment = 'distance to center of probe volume'
-
-            # time
-            # get start time for storing the campaign start (first measurement)
-            # timestamp in comment
-            start_time = datetime.utcfromtimestamp(measured_info[0, 0]).isoformat() + 'Z'
-            # timestamps are stored as seconds since campaign start
-            _time = measured_info[:, 0] - measured_info[0, 0]
-            time = dataset.createVariable('time', 'f4', ('time',))
-            time.units = 's'
-            time.long_name = 'time stamp'
-            time[:] = _time
-            time.comment = 'seconds since campaign start at ' + start_time
-
-            # create the data variables
-            # TODO: get the scan type from data
-            scan_type = dataset.createVariable('scan_type', 'i', 'time')
-            scan_type.units = 'none'
-            scan_type.long_name = 'scan_type_of_the_measurement'
-            scan_type[:] = np.ones((n_rays, 1)) * get_scan_type(header['Filename'])
-
-            # TODO: define scan ID
-            scan_id = dataset.createVariable('scan_id', 'i', 'time')
-            scan_id.units = 'none'
-            scan_id.long_name = 'scan_id_of_the_measurement'
-
-            #
-            scan_cycle = dataset.createVariable('scan_cycle', 'i', 'time')
-            scan_cycle.units = 'none'
-            scan_cycle.long_name = 'scan_cycle_number'
-            scan_cycle[:] = np.ones((n_rays, 1))
-
-            # create the beam steering variables
-            # azimuth
-            _azimuth = measured_info[:, 1]
-            azimuth_angle = dataset.createVariable('azimuth_angle', 'f4', 'time')
-            azimuth_angle.units = 'degrees'
-            azimuth_angle.long_name = 'azimuth_angle_of_lidar_beam'
-            azimuth_angle[:] = _azimuth
-            azimuth_angle.comment = 'clock-wise angle from north'
-            azimuth_angle.accuracy = ''
-            azimuth_angle.accuracy_info = 'max resolution 0.00072 degrees'
-
-            # elevation
-            _elevation = measured_info[:, 2]
-            elevation_angle = dataset.createVariable('elevation_angle', 'f4', 'time')
-            elevation_angle.units = 'degrees'
-            elevation_angle.long_name = 'elevation_angle_of_lidar beam'
-            elevation_angle[:] = _elevation
-            elevation_angle.comment = 'upwards angle from horizontal'
-            elevation_angle.accuracy = ''
-            elevation_angle.accuracy_info = 'max resolution 0.00144 degrees'
-
-            # yaw, pitch, roll
-            # yaw is not available
-            _yaw = np.zeros(measured_info[:, 3].shape)
-            yaw = dataset.createVariable('yaw', 'f4', 'time')
-            yaw.units = 'degrees'
-            yaw.long_name = 'lidar_yaw_angle'
-            yaw[:] = _yaw
-            yaw.comment = 'The home position is configured in a way that 0 ' \
-                          'azimuth corresponds to north.'
-            yaw.accuracy = ''
-
-            _pitch = measured_info[:, 3]
-            pitch = dataset.createVariable('pitch', 'f4', 'time')
-            pitch.units = 'degrees'
-            pitch.long_name = 'lidar_pitch_angle'
-            pitch[:] = _pitch
-            pitch.comment = ''
-            pitch.accuracy = ''
-            pitch.accuracy_info = 'No information on pitch accuracy available.'
-
-            _roll = measured_info[:, 4]
-            roll = dataset.createVariable('roll', 'f4', 'time')
-            roll.units = 'degrees'
-            roll.long_name = 'lidar_roll_angle'
-            roll[:] = _roll
-            roll.comment = ''
-            roll.accuracy = ''
-            roll.accuracy_info = 'No information on roll accuracy available.'
-
-            # measurement variables
-
-            # Doppler velocity
-            DOPPLER = dataset.createVariable('VEL', 'f4', ('time', 'range'))
-            DOPPLER.units = 'm.s-1'
-            DOPPLER.long_name = 'doppler'
-            DOPPLER[:, :] = measured_data[:, 1].reshape(n_rays, n_gates)
-
-            INTENSITY = dataset.createVariable('INTENSITY', 'f4', ('time', 'range'))
-            INTENSITY.units = ''
-            INTENSITY.long_name = 'intensity'
-            INTENSITY.comment = 'snr + 1'
-            INTENSITY[:] = measured_data[:, 2].reshape(n_rays, n_gates)
-
-            BACKSCATTER = dataset.createVariable('BACKSCATTER', 'f4', ('time', 'range'))
-            BACKSCATTER.units = 'm-1.s-1'
-            BACKSCATTER.long_name = 'backscatter'
-            BACKSCATTER[:] = measured_data[:, 3].reshape(n_rays, n_gates)
 
-        else:
-            # get current number of stored measurements
-            n_times = len(dataset.dimensions['time'])
+        # create the dimensions
+        block.createDimension('range', header['Number of gates'])
+        # the time dimension must be without limits (None) to append later
+        block.createDimension('time', None)
+
+        # create the coordinate variables
+
+        # range
+        # see header of measurement file
+        # Center of gate = (range gate + 0.5) * Gate length
+        gate_length = header['Range gate length (m)']
+        _range_dist = (measured_data[0, :, 0].astype(np.float64) + 0.5) * gate_length
+        range_dist = block.createVariable('range', 'f4', ('range',))
+        range_dist.units = 'm'
+        range_dist.long_name = 'range_gate_distance_from_lidar'
+        range_dist[:] = _range_dist
+        range_dist.comment = 'distance to center of probe volume'
+
+        # time
+        # get start time for storing the campaign start (first measurement)
+        # timestamp in comment
+        start_time = datetime.fromtimestamp(measured_info[0, 0], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        # timestamps are stored as seconds since campaign start, in float64 to keep the precision of the ray
+        # times (the float32 time of files written by previous versions takes appended rays cast to float32)
+        _time = measured_info[:, 0] - measured_info[0, 0]
+        time = block.createVariable('time', 'f8', ('time',))
+        time.units = 's'
+        time.long_name = 'time stamp'
+        time[:] = _time
+        time.comment = 'seconds since campaign start at ' + start_time
+
+        # create the data variables
+        # TODO: get the scan type from data
+        scan_type = block.createVariable('scan_type', 'i', 'time')
+        scan_type.units = 'none'
+        scan_type.long_name = 'scan_type_of_the_measurement'
+        scan_type[:] = np.ones((n_rays, 1)) * get_scan_type(header['Filename'])
+
+        # TODO: define scan ID
+        scan_id = block.createVariable('scan_id', 'i', 'time')
+        scan_id.units = 'none'
+        scan_id.long_name = 'scan_id_of_the_measurement'
+
+        #
+        scan_cycle = block.createVariable('scan_cycle', 'i', 'time')
+        scan_cycle.units = 'none'
+        scan_cycle.long_name = 'scan_cycle_number'
+        scan_cycle[:] = np.ones((n_rays, 1))
+
+        # create the beam steering variables
+        # azimuth
+        _azimuth = measured_info[:, 1]
+        azimuth_angle = block.createVariable('azimuth_angle', 'f4', 'time')
+        azimuth_angle.units = 'degrees'
+        azimuth_angle.long_name = 'azimuth_angle_of_lidar_beam'
+        azimuth_angle[:] = _azimuth
+        azimuth_angle.comment = 'clock-wise angle from north'
+        azimuth_angle.accuracy = ''
+        azimuth_angle.accuracy_info = 'max resolution 0.00072 degrees'
+
+        # elevation
+        _elevation = measured_info[:, 2]
+        elevation_angle = block.createVariable('elevation_angle', 'f4', 'time')
+        elevation_angle.units = 'degrees'
+        elevation_angle.long_name = 'elevation_angle_of_lidar beam'
+        elevation_angle[:] = _elevation
+        elevation_angle.comment = 'upwards angle from horizontal'
+        elevation_angle.accuracy = ''
+        elevation_angle.accuracy_info = 'max resolution 0.00144 degrees'
+
+        # yaw, pitch, roll
+        # yaw is not available
+        _yaw = np.zeros(measured_info[:, 3].shape)
+        yaw = block.createVariable('yaw', 'f4', 'time')
+        yaw.units = 'degrees'
+        yaw.long_name = 'lidar_yaw_angle'
+        yaw[:] = _yaw
+        yaw.comment = 'The home position is configured in a way that 0 ' \
+                      'azimuth corresponds to north.'
+        yaw.accuracy = ''
+
+        _pitch = measured_info[:, 3]
+        pitch = block.createVariable('pitch', 'f4', 'time')
+        pitch.units = 'degrees'
+        pitch.long_name = 'lidar_pitch_angle'
+        pitch[:] = _pitch
+        pitch.comment = ''
+        pitch.accuracy = ''
+        pitch.accuracy_info = 'No information on pitch accuracy available.'
+
+        _roll = measured_info[:, 4]
+        roll = block.createVariable('roll', 'f4', 'time')
+        roll.units = 'degrees'
+        roll.long_name = 'lidar_roll_angle'
+        roll[:] = _roll
+        roll.comment = ''
+        roll.accuracy = ''
+        roll.accuracy_info = 'No information on roll accuracy available.'
+
+        # measurement variables
+
+        # Doppler velocity
+        DOPPLER = block.createVariable('VEL', 'f4', ('time', 'range'))
+        DOPPLER.units = 'm.s-1'
+        DOPPLER.long_name = 'doppler'
+        DOPPLER[:, :] = measured_data[:, :, 1]
+
+        INTENSITY = block.createVariable('INTENSITY', 'f4', ('time', 'range'))
+        INTENSITY.units = ''
+        INTENSITY.long_name = 'intensity'
+        INTENSITY.comment = 'snr + 1'
+        INTENSITY[:] = measured_data[:, :, 2]
+
+        BACKSCATTER = block.createVariable('BACKSCATTER', 'f4', ('time', 'range'))
+        BACKSCATTER.units = 'm-1.s-1'
+        BACKSCATTER.long_name = 'backscatter'
+        BACKSCATTER[:] = measured_data[:, :, 3]
+
+        return block
+
+    def emit(self, dataset, block, context):
+        timestamps = block.info['timestamps']
+        if context.appending:
+            block = block.copy()
 
             # time
-            #get campaign start time
-            _start_time = dataset.variables['time'].comment
-            start_time = datetime.strptime(_start_time[-27:], "%Y-%m-%dT%H:%M:%S.%fZ")
-            _time = measured_info[:, 0] - start_time.timestamp()
-            dataset.variables['time'][n_times:] = _time
-
-            # scan type
-            _scan_type = np.ones((n_rays, 1)) * get_scan_type(header['Filename'])
-            dataset.variables['scan_type'][n_times:] = _scan_type
-
-            # scan cycle
-            _last_scan_cycle = dataset.variables['scan_cycle'][n_times - 1]
-            _scan_cycle = np.ones((n_rays, 1)) * (_last_scan_cycle + 1)
-            dataset.variables['scan_cycle'][n_times:] = _scan_cycle
-
-
-            # azimuth
-            _azimuth = measured_info[:, 1]
-            dataset.variables['azimuth_angle'][n_times:] = _azimuth
-
-            # elevation
-            _elevation = measured_info[:, 2]
-            dataset.variables['elevation_angle'][n_times:] = _elevation
-
-            # yaw is not available
-            _yaw = np.zeros(measured_info[:, 3].shape)
-            dataset.variables['yaw'][n_times:] = _yaw
-
-            # pitch
-            _pitch = measured_info[:, 3]
-            dataset.variables['pitch'][n_times:] = _pitch
-
-            # roll
-            _roll = measured_info[:, 4]
-            dataset.variables['roll'][n_times:] =  _roll
-
-            # doppler
-            _doppler = measured_data[:, 1].reshape(n_rays, n_gates)
-            dataset.variables['VEL'][n_times:] = _doppler
-
-            # intensity
-            _intensity = measured_data[:, 2].reshape(n_rays, n_gates)
-            dataset.variables['INTENSITY'][n_times:] = _intensity
+            if context.campaign_start is None:
+                # get campaign start time, of a dataset written without this context
+                _start_time = dataset.variables['time'].comment
+                # e.g. seconds since campaign start at 2019-03-08T20:05:03.231600Z (or without the microseconds)
+                start_time = datetime.fromisoformat(_start_time.rsplit('at ', 1)[-1].strip().rstrip('Z'))
+                context.campaign_start = start_time.replace(tzinfo=timezone.utc).timestamp()
+            block['time'][:] = timestamps - context.campaign_start
+
+            # scan cycle, the same for the chunks of a file
+            if context.last_scan_cycle is None:
+                context.last_scan_cycle = dataset.variables['scan_cycle'][context.n_rows - 1]
+            scan_cycle = context.last_scan_cycle + (0 if block.info.get('continued') else 1)
+            block['scan_cycle'][:] = np.ones((len(timestamps), 1)) * scan_cycle
+        else:
+            context.campaign_start = timestamps[0]
 
-            # backscatter
-            _backscatter = measured_data[:, 3].reshape(n_rays, n_gates)
-            dataset.variables['BACKSCATTER'][n_times:] = _backscatter
+        super().emit(dataset, block, context)
+        context.last_scan_cycle = np.ravel(block['scan_cycle'][:])[-1]
@@ -1,11 +1,12 @@
-import netCDF4 as nc
 import json
 
 from ..core.Writer import Writer
+from ..core.MetadataDataset import MetadataDataset
 
 
 class MetadataCard(Writer):
     nc_dataset = None
+    metadata_only = True
 
     def __init__(self, dir_path, name):
         super().__init__(dir_path, name)
@@ -15,9 +16,9 @@ class MetadataCard(Writer):
 
     def __enter__(self):
         if not self.append:
-            self.nc_dataset = nc.Dataset(self.file_path(), 'w', diskless=True)
+            self.nc_dataset = MetadataDataset(self.file_path())
 
-        return self.nc_dataset.__enter__()
+        return self.nc_dataset
 
     def __exit__(self, type, value, traceback):
         if not self.append:
@@ -27,6 +28,7 @@ class MetadataCard(Writer):
             # Writing attributes
             for ncattr in self.nc_dataset.ncattrs():
                 metadata_card[ncattr] = self.nc_dataset.getncattr(ncattr)
+            self.nc_dataset.close()
 
             with open(self.file_path(), "w") as json_file:
                 json_file.write(json.dumps(metadata_card, indent=4))
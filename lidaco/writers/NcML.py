@@ -1,8 +1,7 @@
 from lxml.etree import Element, ElementTree
 
-import netCDF4 as nc
-
 from ..core.Writer import Writer
+from ..core.MetadataDataset import MetadataDataset
 
 NS = "http://www.unidata.ucar.edu/namespaces/netcdf/ncml-2.2"
 PREFIX = '{' + NS + '}'
@@ -11,6 +10,7 @@ NS_MAP = {'ncml': NS}
 
 class NcML(Writer):
     nc_dataset = None
+    metadata_only = True
 
     def __init__(self, dir_path, name):
         super().__init__(dir_path, name)
@@ -20,10 +20,10 @@ class NcML(Writer):
 
     def __enter__(self):
         if not self.append:
-            self.nc_dataset = nc.Dataset(self.file_path(), 'w', diskless=True)
+            self.nc_dataset = MetadataDataset(self.file_path())
             self.dataset = ElementTree(Element(PREFIX + "netcdf", nsmap=NS_MAP))
 
-        return self.nc_dataset.__enter__()
+        return self.nc_dataset
     def __exit__(self, type, value, traceback):
         if not self.append:
             # Writing dimensions
@@ -65,6 +65,7 @@ class NcML(Writer):
                     attr_elem.set('value', " ".join([str(s) for s in var.chunking()]))
                     element.append(attr_elem)
 
-                    self.dataset.getroot().append(element)
+                self.dataset.getroot().append(element)
 
+            self.nc_dataset.close()
             return self.dataset.write(self.file_path(), xml_declaration=True, encoding="UTF-8", pretty_print=True)
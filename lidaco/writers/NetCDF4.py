@@ -5,6 +5,7 @@ from ..core.Writer import Writer
 
 class NetCDF4(Writer):
     dataset = None
+    appendable = True
 
     def __init__(self, dir_path, name):
         super().__init__(dir_path, name)